@@ -6,7 +6,8 @@ Automatically improves scheduling through machine learning
 from .config import CONFIG, TrainingConfig
 from .data_store import ScheduleDataStore
 from .feature_extractor import FeatureExtractor
-from .trainer import ModelTrainer
+from .feature_cache import FeatureCache
+from .trainer import ModelTrainer, get_shared_trainer
 from .hybrid_scheduler import HybridScheduler
 from .retraining_service import (
     RetrainingService,
@@ -20,7 +21,9 @@ __all__ = [
     'TrainingConfig',
     'ScheduleDataStore',
     'FeatureExtractor',
+    'FeatureCache',
     'ModelTrainer',
+    'get_shared_trainer',
     'HybridScheduler',
     'RetrainingService',
     'get_retraining_service',
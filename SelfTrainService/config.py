@@ -16,12 +16,15 @@ class TrainingConfig:
     # Data requirements
     MIN_SCHEDULES_FOR_TRAINING: int = 100  # Minimum schedules needed
     MIN_SCHEDULES_FOR_RETRAIN: int = 50   # Minimum new schedules for retrain
+    RETRAIN_CHECK_TTL_SECONDS: int = 60  # Reuse the new-schedule count for this long
     
     # Model parameters
     MODEL_VERSION: str = "v1.0.0"
     MODEL_TYPES: list = None  # type: ignore # Will be set in __post_init__
     USE_ENSEMBLE: bool = True  # Use ensemble of best models
     ENSEMBLE_TOP_N: int = 3  # Use top N models for ensemble
+    ENSEMBLE_TEMPERATURE: float = 0.1  # Softmax temperature over model R² for ensemble weights
+    TRAINING_WORKERS: int = 0  # Processes fitting models in parallel (0 = one per model up to CPU count, 1 = sequential)
     
     # Paths
     DATA_DIR: str = "data/schedules"
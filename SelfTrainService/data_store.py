@@ -1,82 +1,434 @@
 """
 Data Storage and Management for Self-Training
 Handles schedule data collection and storage
+
+Schedules are appended, one orjson line each, to monthly archives
+(``schedules-YYYYMM.jsonl``). Per-schedule ``.json`` files written by older
+versions are still read.
+
+Each archived schedule's feature row (``CONFIG.FEATURES`` then the target,
+float32) is also appended to ``features.f32`` in archive order, so training
+can memory-map the dataset instead of re-parsing JSON. ``features.index``
+records the size and record count of each archive the mirror covers, which
+also lets schedules be counted without reading the archives.
 """
-import json
+import heapq
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
+
+import numpy as np
+import orjson
+
 from .config import CONFIG
+from .feature_extractor import FeatureExtractor
+
+try:
+    import fcntl
+    FLOCK_AVAILABLE = True
+except ImportError:
+    FLOCK_AVAILABLE = False
+
+
+# File reads overlap syscalls and orjson parsing (which releases the GIL)
+MAX_IO_WORKERS = min(32, os.cpu_count() or 4)
+
+ARCHIVE_PREFIX = "schedules-"
+ARCHIVE_SUFFIX = ".jsonl"
+
+FEATURE_MIRROR = "features.f32"
+FEATURE_MIRROR_INDEX = "features.index"
+
+# Serializes appends and rewrites of archives within this process; an flock
+# on the data directory (see ScheduleDataStore._locked) covers other processes
+_ARCHIVE_LOCK = threading.Lock()
+
+
+def is_archive_name(name: str) -> bool:
+    """True for monthly schedule archives"""
+    return name.startswith(ARCHIVE_PREFIX) and name.endswith(ARCHIVE_SUFFIX)
+
+
+def is_legacy_name(name: str) -> bool:
+    """True for legacy one-file-per-schedule storage"""
+    return name.endswith(".json")
+
+
+def _read_one(path: str) -> Optional[Dict]:
+    """Read and parse one schedule file, None if it cannot be loaded"""
+    try:
+        return orjson.loads(Path(path).read_bytes())
+    except Exception as e:
+        print(f"Error loading {path}: {e}")
+        return None
+
+
+def _read_many(paths: List[str]) -> List[Optional[Dict]]:
+    """Read schedule files in parallel, preserving order (None for failures)"""
+    if len(paths) <= 1:
+        return [_read_one(p) for p in paths]
+    with ThreadPoolExecutor(max_workers=min(MAX_IO_WORKERS, len(paths))) as ex:
+        return list(ex.map(_read_one, paths))
+
+
+def _parse_line(line: bytes, path: str) -> Optional[Dict]:
+    try:
+        return orjson.loads(line)
+    except Exception as e:
+        print(f"Error loading record from {path}: {e}")
+        return None
+
+
+def _count_records(path: str) -> int:
+    """Count complete, non-blank lines, the records ``read_archive`` returns"""
+    with open(path, 'rb') as f:
+        return sum(1 for line in f if line.endswith(b"\n") and line.strip())
 
 
 class ScheduleDataStore:
     """Store and manage schedule data for training"""
     
-    def __init__(self, data_dir: Optional[str] = None):
+    def __init__(
+        self,
+        data_dir: Optional[str] = None,
+        feature_extractor: Optional[FeatureExtractor] = None
+    ):
         self.data_dir = Path(data_dir or CONFIG.DATA_DIR)
         self.data_dir.mkdir(parents=True, exist_ok=True)
+        self.feature_extractor = feature_extractor or FeatureExtractor()
+        self.features_path = self.data_dir / FEATURE_MIRROR
+        self.mirror_index_path = self.data_dir / FEATURE_MIRROR_INDEX
     
-    def save_schedule(self, schedule: Dict, metadata: Optional[Dict] = None) -> str:
-        """Save a schedule to storage"""
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        schedule_id = schedule.get("schedule_id", f"schedule_{timestamp}")
-        filename = f"{schedule_id}_{timestamp}.json"
-        filepath = self.data_dir / filename
+    @contextmanager
+    def _locked(self):
+        """Hold the archive lock against other threads and other processes
         
+        API workers, the retraining service and scripts may share a data
+        directory, so archive appends and rewrites, together with the feature
+        mirror update, also take an exclusive flock on the data directory
+        where the OS has one.
+        """
+        with _ARCHIVE_LOCK:
+            if not FLOCK_AVAILABLE:
+                yield
+                return
+            fd = os.open(self.data_dir, os.O_RDONLY)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+                yield
+            finally:
+                os.close(fd)
+    
+    def save_schedule(self, schedule: Dict, metadata: Optional[Dict] = None) -> str:
+        """Append a schedule to this month's archive, returning the archive path"""
+        now = datetime.now()
         data = {
             "schedule": schedule,
             "metadata": metadata or {},
-            "saved_at": datetime.now().isoformat()
+            "saved_at": now.isoformat()
         }
+        line = orjson.dumps(
+            data,
+            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS,
+            default=str
+        ) + b"\n"
         
-        with open(filepath, 'w') as f:
-            json.dump(data, f, indent=2, default=str)
+        # Extract from the serialized record so the row matches what a
+        # reader of the archive would compute (e.g. datetimes become strings)
+        row = self.feature_extractor.feature_rows([orjson.loads(line)])
+        
+        filepath = self.data_dir / f"{ARCHIVE_PREFIX}{now:%Y%m}{ARCHIVE_SUFFIX}"
+        with self._locked():
+            sizes = self._archive_sizes()
+            counts = self._mirror_counts(sizes)
+            # One write() on an O_APPEND file keeps each line intact
+            with open(filepath, 'ab') as f:
+                f.write(line)
+            # The mirror and its index are written after the archive; if this
+            # is interrupted the index no longer matches and the mirror is
+            # rebuilt on the next load
+            if counts is not None:
+                with open(self.features_path, 'ab') as f:
+                    f.write(row.tobytes())
+                sizes[filepath.name] = sizes.get(filepath.name, 0) + len(line)
+                counts[filepath.name] = counts.get(filepath.name, 0) + 1
+                self._write_mirror_index(sizes, counts)
         
         return str(filepath)
     
+    def _row_bytes(self) -> int:
+        return (len(CONFIG.FEATURES) + 1) * np.dtype(np.float32).itemsize  # type: ignore
+    
+    def _archive_sizes(self) -> Dict[str, int]:
+        return {e.name: e.stat().st_size for e in self._scan_archives()}
+    
+    def _write_mirror_index(self, sizes: Dict[str, int], counts: Dict[str, int]):
+        tmp_path = self.mirror_index_path.with_name(FEATURE_MIRROR_INDEX + ".tmp")
+        tmp_path.write_bytes(orjson.dumps({
+            name: [size, counts[name]] for name, size in sizes.items()
+        }))
+        os.replace(tmp_path, self.mirror_index_path)
+    
+    def _mirror_counts(self, sizes: Dict[str, int]) -> Optional[Dict[str, int]]:
+        """Per-archive record counts if the feature mirror is current, else None
+        
+        The mirror is current when it covers exactly the archives' contents.
+        The index records the archive sizes the mirror was last synced with,
+        so lines appended by anything other than ``save_schedule`` (or an
+        interrupted save) are detected without reading the archives.
+        """
+        if not self.features_path.exists():
+            return {} if not sizes else None
+        try:
+            indexed = orjson.loads(self.mirror_index_path.read_bytes())
+            counts = {name: count for name, (_, count) in indexed.items()}
+            if {name: size for name, (size, _) in indexed.items()} != sizes:
+                return None
+        except (OSError, AttributeError, TypeError, ValueError):
+            return None
+        if self.features_path.stat().st_size != sum(counts.values()) * self._row_bytes():
+            return None
+        return counts
+    
+    def rebuild_features(self):
+        """Rewrite the feature mirror from all archives (oldest first)"""
+        with self._locked():
+            self._rebuild_features()
+    
+    def _rebuild_features(self):
+        sizes = {}
+        counts = {}
+        tmp_path = self.features_path.with_name(FEATURE_MIRROR + ".tmp")
+        with open(tmp_path, 'wb') as f:
+            for entry in reversed(self._scan_archives()):
+                records, end = self.read_archive(entry.path)
+                parsed = [record for _, record in records if record is not None]
+                # Unparseable lines keep their slot as an all-NaN row
+                rows = np.full((len(records), len(CONFIG.FEATURES) + 1), np.nan, dtype=np.float32)  # type: ignore
+                rows[[record is not None for _, record in records]] = (
+                    self.feature_extractor.feature_rows(parsed)
+                )
+                f.write(rows.tobytes())
+                sizes[entry.name] = end
+                counts[entry.name] = len(records)
+        os.replace(tmp_path, self.features_path)
+        self._write_mirror_index(sizes, counts)
+    
+    def refresh_features(self) -> int:
+        """Rebuild the feature mirror if it is stale, returning its row count"""
+        with self._locked():
+            sizes = self._archive_sizes()
+            if not sizes:
+                return 0
+            if self._mirror_counts(sizes) is None:
+                self._rebuild_features()
+            return self.features_path.stat().st_size // self._row_bytes()
+    
+    def load_features(self) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """Memory-mapped (X, y) of archived schedules, newest first
+        
+        Rebuilds the mirror if it is stale. Returns None when nothing is
+        archived. Legacy ``.json`` files are not mirrored; ``FeatureCache``
+        adds their rows.
+        """
+        num_rows = self.refresh_features()
+        if num_rows == 0:
+            return None
+        rows = np.memmap(
+            self.features_path, dtype=np.float32, mode='r',
+            shape=(num_rows, len(CONFIG.FEATURES) + 1)  # type: ignore
+        )[::-1]
+        if np.isnan(rows[:, -1]).any():
+            rows = rows[~np.isnan(rows[:, -1])]
+        return rows[:, :-1], rows[:, -1]
+    
+    def _scan_archives(self) -> List[os.DirEntry]:
+        """Monthly archives, newest first"""
+        with os.scandir(self.data_dir) as it:
+            entries = [e for e in it if is_archive_name(e.name) and e.is_file()]
+        return sorted(entries, key=lambda e: e.name, reverse=True)
+    
+    def list_archives(self) -> List[Tuple[str, int, int]]:
+        """List (path, size, inode) of monthly archives, newest first"""
+        result = []
+        for e in self._scan_archives():
+            st = e.stat()
+            result.append((e.path, st.st_size, st.st_ino))
+        return result
+    
+    def read_archive(self, path: str, start: int = 0) -> Tuple[List[Tuple[int, Optional[Dict]]], int]:
+        """Read complete lines of an archive from byte offset ``start``
+        
+        Returns ``[(offset, record)]`` in file order (record is None if the
+        line fails to parse) and the offset just past the last complete line,
+        so a concurrently appended partial line is picked up by the next read.
+        """
+        with open(path, 'rb') as f:
+            f.seek(start)
+            buf = f.read()
+        
+        end = buf.rfind(b"\n") + 1
+        records = []
+        offset = start
+        for line in buf[:end].splitlines(keepends=True):
+            if line.strip():
+                records.append((offset, _parse_line(line, path)))
+            offset += len(line)
+        return records, start + end
+    
+    def _archive_records(self, path: str) -> List[Dict]:
+        records, _ = self.read_archive(path)
+        return [record for _, record in records if record is not None]
+    
+    def _scan_files(self) -> List[os.DirEntry]:
+        """List legacy schedule files; DirEntry caches name and stat results"""
+        with os.scandir(self.data_dir) as it:
+            return [e for e in it if is_legacy_name(e.name) and e.is_file()]
+    
+    def list_files(self) -> List[Tuple[str, int]]:
+        """List (path, mtime_ns) of legacy schedule files, newest first"""
+        entries = sorted(self._scan_files(), key=lambda e: e.name, reverse=True)
+        return [(e.path, e.stat().st_mtime_ns) for e in entries]
+    
+    def read_files(self, paths: List[str]) -> List[Optional[Dict]]:
+        """Read the given schedule files; None marks a file that failed to load"""
+        return _read_many(paths)
+    
+    def _load_files(self, paths: List[str]) -> List[Dict]:
+        return [data for data in _read_many(paths) if data is not None]
+    
     def load_schedules(self, limit: Optional[int] = None) -> List[Dict]:
-        """Load schedules from storage"""
-        schedules = []
-        files = sorted(self.data_dir.glob("*.json"), reverse=True)
+        """Load schedules from storage, newest archived first, then legacy files"""
+        schedules: List[Dict] = []
         
-        if limit:
-            files = files[:limit]
+        for entry in self._scan_archives():
+            schedules.extend(reversed(self._archive_records(entry.path)))
+            if limit and len(schedules) >= limit:
+                return schedules[:limit]
         
-        for filepath in files:
-            try:
-                with open(filepath, 'r') as f:
-                    data = json.load(f)
-                    schedules.append(data)
-            except Exception as e:
-                print(f"Error loading {filepath}: {e}")
+        entries = self._scan_files()
+        if limit:
+            files = heapq.nlargest(limit - len(schedules), entries, key=lambda e: e.name)
+        else:
+            files = sorted(entries, key=lambda e: e.name, reverse=True)
         
+        schedules.extend(self._load_files([entry.path for entry in files]))
         return schedules
     
     def count_schedules(self) -> int:
-        """Count total schedules in storage"""
-        return len(list(self.data_dir.glob("*.json")))
+        """Count total schedules in storage
+        
+        Archived schedules are counted from the feature mirror's index; the
+        archives are only read when the mirror is stale.
+        """
+        counts = self._mirror_counts(self._archive_sizes())
+        if counts is None:
+            archived = sum(_count_records(e.path) for e in self._scan_archives())
+        else:
+            archived = sum(counts.values())
+        with os.scandir(self.data_dir) as it:
+            return archived + sum(1 for e in it if is_legacy_name(e.name) and e.is_file())
     
     def get_schedules_since(self, since: datetime) -> List[Dict]:
-        """Get schedules created after a specific time"""
+        """Get schedules created after a specific time
+        
+        ``since`` and the stored ``saved_at`` values are compared as POSIX
+        timestamps, so either may be naive (local time) or timezone-aware.
+        """
+        since_ts = since.timestamp()
         schedules = []
         
-        for filepath in self.data_dir.glob("*.json"):
-            if os.path.getmtime(filepath) > since.timestamp():
+        for entry in self._scan_archives():
+            # Archives untouched since then cannot hold newer records
+            if entry.stat().st_mtime <= since_ts:
+                continue
+            for record in self._archive_records(entry.path):
                 try:
-                    with open(filepath, 'r') as f:
-                        schedules.append(json.load(f))
-                except Exception as e:
-                    print(f"Error loading {filepath}: {e}")
+                    saved_ts = datetime.fromisoformat(record["saved_at"]).timestamp()
+                except (KeyError, TypeError, ValueError, OverflowError, OSError):
+                    saved_ts = None
+                if saved_ts is None or saved_ts > since_ts:
+                    schedules.append(record)
         
+        schedules.extend(self._load_files([
+            entry.path for entry in self._scan_files()
+            if entry.stat().st_mtime > since_ts
+        ]))
         return schedules
     
     def clear_old_schedules(self, keep_count: int = 1000):
         """Keep only the most recent schedules"""
-        files = sorted(self.data_dir.glob("*.json"), reverse=True)
+        remaining = keep_count
+        
+        # Archives and the mirror are trimmed under one lock so no save lands
+        # between counting the records and writing the mirror index
+        with self._locked():
+            counts = self._mirror_counts(self._archive_sizes())
+            kept_counts = {}
+            
+            for entry in self._scan_archives():
+                filepath = entry.path
+                try:
+                    if counts is not None and entry.name in counts:
+                        num_records = counts[entry.name]
+                    else:
+                        num_records = _count_records(filepath)
+                    if remaining >= num_records:
+                        remaining -= num_records
+                        kept_counts[entry.name] = num_records
+                    elif remaining == 0:
+                        os.unlink(filepath)
+                    else:
+                        # Keep the newest (last) records of the boundary archive
+                        with open(filepath, 'rb') as f:
+                            lines = [
+                                line for line in f
+                                if line.endswith(b"\n") and line.strip()
+                            ]
+                        tmp_path = filepath + ".tmp"
+                        with open(tmp_path, 'wb') as f:
+                            f.writelines(lines[-remaining:])
+                        os.replace(tmp_path, filepath)
+                        kept_counts[entry.name] = remaining
+                        remaining = 0
+                except Exception as e:
+                    print(f"Error trimming {filepath}: {e}")
+            
+            self._trim_features(keep_count - remaining, kept_counts if counts is not None else None)
         
-        for filepath in files[keep_count:]:
+        files = sorted(self._scan_files(), key=lambda e: e.name, reverse=True)
+        
+        for entry in files[remaining:]:
+            filepath = entry.path
             try:
-                filepath.unlink()
+                os.unlink(filepath)
             except Exception as e:
                 print(f"Error deleting {filepath}: {e}")
+    
+    def _trim_features(self, kept: int, counts: Optional[Dict[str, int]]):
+        """Keep the mirror rows of the ``kept`` newest archived schedules
+        
+        ``counts`` holds the remaining archives' record counts, or None if
+        the mirror was already stale. The caller holds the archive lock.
+        """
+        if not self.features_path.exists():
+            return
+        sizes = self._archive_sizes()
+        if counts is None or counts.keys() != sizes.keys():
+            # Rebuilt from the trimmed archives on next load
+            self.features_path.unlink()
+            return
+        row_bytes = self._row_bytes()
+        with open(self.features_path, 'rb') as f:
+            size = f.seek(0, os.SEEK_END)
+            f.seek(max(0, size - kept * row_bytes))
+            data = f.read() if kept else b""
+        tmp_path = self.features_path.with_name(FEATURE_MIRROR + ".tmp")
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, self.features_path)
+        self._write_mirror_index(sizes, counts)
@@ -0,0 +1,228 @@
+"""
+Persistent Feature Cache for Self-Training
+Assembles the training dataset without re-parsing schedules already seen
+
+Archived schedules come from the data store's memory-mapped feature mirror;
+rows of legacy per-schedule ``.json`` files, which the mirror does not cover,
+are kept on disk here.
+"""
+import os
+import threading
+import uuid
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from .config import CONFIG
+from .data_store import ScheduleDataStore
+from .feature_extractor import FeatureExtractor
+
+
+class FeatureCache:
+    """Training dataset of all stored schedules
+
+    This is the one place training reads features from. Archived schedules
+    are read from ``ScheduleDataStore.load_features``; legacy files are
+    keyed by (path, mtime_ns) so only new or changed ones are extracted.
+
+    ``cache_path`` is a small manifest (feature list and shard list); rows
+    live in shard files beside it. New rows are written as a new shard, so a
+    save costs the size of the change, not of the dataset. Shards are
+    compacted into one when rows are dropped or there are ``MAX_SHARDS``.
+    """
+
+    ROW_KEYS = ("paths", "mtimes", "X", "y", "valid")
+    MAX_SHARDS = 32
+
+    def __init__(
+        self,
+        cache_path: Optional[str] = None,
+        data_store: Optional[ScheduleDataStore] = None,
+        feature_extractor: Optional[FeatureExtractor] = None
+    ):
+        self.cache_path = Path(cache_path or Path(CONFIG.CHECKPOINT_DIR) / "features.npz")
+        self.data_store = data_store or ScheduleDataStore()
+        self.feature_extractor = feature_extractor or FeatureExtractor()
+        self._lock = threading.Lock()
+        # (manifest identity, cache) of the last load or save
+        self._loaded: Optional[Tuple[Tuple[int, int, int], Dict[str, np.ndarray]]] = None
+
+    def _empty(self) -> Dict[str, np.ndarray]:
+        return {
+            "paths": np.array([], dtype=str),
+            "mtimes": np.array([], dtype=np.int64),
+            "X": np.empty((0, len(CONFIG.FEATURES))),  # type: ignore
+            "y": np.empty(0),
+            "valid": np.array([], dtype=bool),
+            "shards": np.array([], dtype=str),
+        }
+
+    def _shard_path(self, name: str) -> Path:
+        return self.cache_path.with_name(f"{self.cache_path.stem}-{name}.npz")
+
+    def _manifest_stamp(self) -> Tuple[int, int, int]:
+        st = self.cache_path.stat()
+        return st.st_ino, st.st_mtime_ns, st.st_size
+
+    def _load(self) -> Dict[str, np.ndarray]:
+        """Load cached rows; a cache built for other features is discarded
+
+        The rows from the last load or save are reused while the manifest is
+        unchanged, so only another process's save makes this re-read shards.
+        """
+        try:
+            stamp = self._manifest_stamp()
+        except FileNotFoundError:
+            return self._empty()
+        if self._loaded is not None and self._loaded[0] == stamp:
+            return dict(self._loaded[1])
+
+        try:
+            with np.load(self.cache_path, allow_pickle=False) as data:
+                if "shards" not in data:
+                    return self._empty()
+                if list(data["features"]) != list(CONFIG.FEATURES):  # type: ignore
+                    return self._empty()
+                cache = {"shards": data["shards"]}
+
+            parts = [self._empty()]
+            for name in cache["shards"]:
+                with np.load(self._shard_path(str(name)), allow_pickle=False) as shard:
+                    # Shards written with other row keys are rebuilt
+                    if any(key not in shard for key in self.ROW_KEYS):
+                        return self._empty()
+                    parts.append({key: shard[key] for key in self.ROW_KEYS})
+        except Exception as e:
+            print(f"Error loading feature cache {self.cache_path}: {e}")
+            return self._empty()
+
+        for key in self.ROW_KEYS:
+            cache[key] = np.concatenate([part[key] for part in parts])
+        self._loaded = (stamp, cache)
+        return dict(cache)
+
+    def _write_npz(self, path: Path, **arrays: np.ndarray):
+        """Write one npz file atomically"""
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, path)
+
+    def _save(self, cache: Dict[str, np.ndarray], appended: Optional[Dict[str, np.ndarray]] = None):
+        """Persist ``cache``, writing only ``appended`` rows when given
+
+        ``appended`` are rows added after those already in ``cache["shards"]``.
+        Without it (rows were dropped), or once there are MAX_SHARDS shards,
+        all rows are compacted into a single new shard.
+        """
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        old_shards = [str(name) for name in cache["shards"]]
+        compact = appended is None or len(old_shards) >= self.MAX_SHARDS
+        rows = cache if compact else appended
+        shards = [] if compact else list(old_shards)
+
+        if len(rows["valid"]):
+            # Unique names: a process with a stale view never overwrites a
+            # shard another process's manifest refers to
+            name = uuid.uuid4().hex
+            self._write_npz(self._shard_path(name), **{key: rows[key] for key in self.ROW_KEYS})
+            shards.append(name)
+
+        cache["shards"] = np.array(shards, dtype=str)
+        self._write_npz(self.cache_path, features=np.array(CONFIG.FEATURES), shards=cache["shards"])
+        self._loaded = (self._manifest_stamp(), dict(cache))
+
+        if compact:
+            for name in old_shards:
+                try:
+                    self._shard_path(name).unlink()
+                except FileNotFoundError:
+                    pass
+
+    def load_dataset(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (X, y) for all stored schedules, newest first like ``load_schedules``
+
+        Archived rows come first, straight from the memory-mapped mirror when
+        there are no legacy files.
+        """
+        with self._lock:
+            cache = self._sync()
+            mirrored = self.data_store.load_features()
+        # Newest first, matching ScheduleDataStore.load_schedules
+        order = np.argsort([os.path.basename(p) for p in cache["paths"]])[::-1]
+        order = order[cache["valid"][order]]
+        if mirrored is None:
+            return cache["X"][order], cache["y"][order]
+        if len(order) == 0:
+            return mirrored
+        X_archived, y_archived = mirrored
+        return (
+            np.concatenate([X_archived, cache["X"][order]]),
+            np.concatenate([y_archived, cache["y"][order]]),
+        )
+
+    def refresh(self):
+        """Bring stored rows up to date without building (X, y)"""
+        with self._lock:
+            self._sync()
+            self.data_store.refresh_features()
+
+    def _sync(self) -> Dict[str, np.ndarray]:
+        """Extract and save rows of new or changed legacy files, dropping removed ones"""
+        files = self.data_store.list_files()
+        cache = self._load()
+
+        cached = {
+            (path, int(mtime)): i
+            for i, (path, mtime) in enumerate(zip(cache["paths"], cache["mtimes"]))
+        }
+
+        keep = []
+        delta = []
+        for path, mtime in files:
+            index = cached.get((path, mtime))
+            if index is None:
+                delta.append((path, mtime))
+            else:
+                keep.append(index)
+
+        dropped = len(keep) != len(cache["paths"])
+        if delta or dropped:
+            appended = self._extract(delta)
+            if dropped:
+                kept = {key: cache[key][np.array(keep, dtype=np.int64)] for key in self.ROW_KEYS}
+            else:
+                kept = {key: cache[key] for key in self.ROW_KEYS}
+            for key in self.ROW_KEYS:
+                cache[key] = np.concatenate([kept[key], appended[key]])
+            self._save(cache, None if dropped else appended)
+        return cache
+
+    def _extract(self, delta) -> Dict[str, np.ndarray]:
+        """Rows for the delta's (path, mtime) files"""
+        paths = [path for path, _ in delta]
+        schedules = self.data_store.read_files(paths)
+
+        loaded = [s for s in schedules if s is not None]
+        X_new, y_new, valid_new = self.feature_extractor.prepare_rows(loaded)
+
+        # Unreadable files are cached as invalid so they are not re-read each run
+        num_features = len(CONFIG.FEATURES)  # type: ignore
+        X_delta = np.full((len(delta), num_features), np.nan)
+        y_delta = np.full(len(delta), np.nan)
+        valid_delta = np.zeros(len(delta), dtype=bool)
+
+        readable = np.flatnonzero([s is not None for s in schedules])
+        rows = readable[valid_new]
+        X_delta[rows] = X_new
+        y_delta[rows] = y_new
+        valid_delta[rows] = True
+
+        return {
+            "paths": np.array(paths, dtype=str),
+            "mtimes": np.array([m for _, m in delta], dtype=np.int64),
+            "X": X_delta,
+            "y": y_delta,
+            "valid": valid_delta,
+        }
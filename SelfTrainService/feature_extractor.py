@@ -3,86 +3,160 @@ Feature Engineering for Schedule ML Model
 Extract features from schedule data for training
 """
 import numpy as np
-from typing import Dict, List, Tuple
+from collections import OrderedDict
+from operator import itemgetter
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 from .config import CONFIG
 
+try:
+    import ciso8601
+    CISO8601_AVAILABLE = True
+except ImportError:
+    CISO8601_AVAILABLE = False
+
+from .feature_kernels import (
+    STATUS_CODES, STATUS_UNKNOWN, PRIORITY_WEIGHTS, CERTIFICATE_ISSUES,
+    OUT_NUM_TRAINS, OUT_NUM_AVAILABLE, OUT_MAINTENANCE_COUNT,
+    OUT_AVG_READINESS, OUT_MIN_READINESS, OUT_TOTAL_MILEAGE,
+    OUT_AVG_MILEAGE, OUT_MILEAGE_VARIANCE, OUT_CERTIFICATE_ISSUES,
+    OUT_BRANDING_PRIORITY, NUM_OUTPUTS, aggregate_schedule, build_feature_matrix
+)
+
+
+# Column of each model feature, fixed at import (CONFIG.FEATURES order)
+FEATURE_COLUMNS = {name: col for col, name in enumerate(CONFIG.FEATURES)}  # type: ignore
+NUM_FEATURES = len(FEATURE_COLUMNS)
+_ordered_features = itemgetter(*CONFIG.FEATURES)  # type: ignore
+
+# Kernel output slot of each aggregate feature
+_KERNEL_SLOTS = {
+    "num_trains": OUT_NUM_TRAINS,
+    "num_available": OUT_NUM_AVAILABLE,
+    "maintenance_count": OUT_MAINTENANCE_COUNT,
+    "avg_readiness_score": OUT_AVG_READINESS,
+    "min_readiness_score": OUT_MIN_READINESS,
+    "total_mileage": OUT_TOTAL_MILEAGE,
+    "avg_mileage": OUT_AVG_MILEAGE,
+    "mileage_variance": OUT_MILEAGE_VARIANCE,
+    "certificate_expiry_count": OUT_CERTIFICATE_ISSUES,
+    "branding_priority_sum": OUT_BRANDING_PRIORITY,
+}
+_KERNEL_COLS = np.array(
+    [FEATURE_COLUMNS[name] for name in _KERNEL_SLOTS if name in FEATURE_COLUMNS], dtype=np.intp
+)
+_KERNEL_OUTS = np.array(
+    [slot for name, slot in _KERNEL_SLOTS.items() if name in FEATURE_COLUMNS], dtype=np.intp
+)
+# Feature column of each kernel output slot (-1 where it is not a feature)
+KERNEL_COLUMN_OF_OUTPUT = np.full(NUM_OUTPUTS, -1, dtype=np.int64)
+KERNEL_COLUMN_OF_OUTPUT[_KERNEL_OUTS] = _KERNEL_COLS
+COL_TIME_OF_DAY = FEATURE_COLUMNS.get("time_of_day")
+COL_DAY_OF_WEEK = FEATURE_COLUMNS.get("day_of_week")
+
+
+def feature_matrix(features_list: List[Dict[str, float]]) -> np.ndarray:
+    """Stack feature dicts into a (N, NUM_FEATURES) matrix; missing features are 0"""
+    X = np.empty((len(features_list), NUM_FEATURES), dtype=np.float64)
+    for i, features in enumerate(features_list):
+        try:
+            X[i] = _ordered_features(features)
+        except KeyError:
+            X[i] = [features.get(f, 0.0) for f in CONFIG.FEATURES]  # type: ignore
+    return X
+
+
+def _parse_iso_fast(value) -> Optional[datetime]:
+    """Parse an ISO-8601 timestamp (offset included), None if missing or invalid"""
+    if not value or not isinstance(value, str):
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        pass
+    if CISO8601_AVAILABLE:
+        try:
+            return ciso8601.parse_datetime(value)
+        except ValueError:
+            pass
+    return None
+
 
 class FeatureExtractor:
     """Extract features from schedule data"""
     
+    def __init__(self, max_cached: int = 100_000):
+        # Stored schedules never change after save, so feature rows are
+        # memoized by (schedule_id, saved_at); rows persist across restarts
+        # in the FeatureCache and the data store's feature mirror instead
+        self.max_cached = max_cached
+        self._row_cache: "OrderedDict[str, Tuple[np.ndarray, float]]" = OrderedDict()
+    
     @staticmethod
-    def extract_from_schedule(schedule: Dict) -> Dict[str, float]:
-        """Extract features from a single schedule"""
-        features = {}
-        
-        # Basic counts
-        trainsets = schedule.get("trainsets", [])
-        features["num_trains"] = len(trainsets)
+    def _encode_trainsets(trainsets: List[Dict]) -> Tuple[List[int], List[float], List[float], List[int], List[int]]:
+        """Encode trainsets as (status, readiness, mileage, cert issues, priority) columns"""
+        status = []
+        readiness = []
+        mileage = []
+        cert_issues = []
+        priority = []
         
-        # Status counts
-        status_counts = {}
         for train in trainsets:
-            status = train.get("status", "UNKNOWN")
-            status_counts[status] = status_counts.get(status, 0) + 1
-        
-        features["num_available"] = (
-            status_counts.get("REVENUE_SERVICE", 0) + 
-            status_counts.get("STANDBY", 0)
-        )
-        features["maintenance_count"] = status_counts.get("MAINTENANCE", 0)
-        
-        # Readiness scores
-        readiness_scores = [
-            t.get("readiness_score", 0.0) for t in trainsets
-        ]
-        features["avg_readiness_score"] = np.mean(readiness_scores) if readiness_scores else 0.0
-        features["min_readiness_score"] = np.min(readiness_scores) if readiness_scores else 0.0
-        
-        # Mileage statistics
-        mileages = [t.get("cumulative_km", 0) for t in trainsets]
-        if mileages:
-            features["total_mileage"] = sum(mileages)
-            features["avg_mileage"] = np.mean(mileages)
-            features["mileage_variance"] = np.var(mileages)
-        else:
-            features["total_mileage"] = 0
-            features["avg_mileage"] = 0
-            features["mileage_variance"] = 0
-        
-        # Certificate expiry
-        certificate_issues = 0
-        for train in trainsets:
-            certs = train.get("fitness_certificates", {})
-            for cert_type, cert_data in certs.items():
+            status.append(STATUS_CODES.get(train.get("status", "UNKNOWN"), STATUS_UNKNOWN))
+            readiness.append(float(train.get("readiness_score", 0.0)))
+            mileage.append(float(train.get("cumulative_km", 0)))
+            
+            issues = 0
+            for cert_data in train.get("fitness_certificates", {}).values():
                 if isinstance(cert_data, dict):
-                    status = cert_data.get("status", "VALID")
-                    if status in ["EXPIRED", "EXPIRING_SOON"]:
-                        certificate_issues += 1
-        features["certificate_expiry_count"] = certificate_issues
-        
-        # Branding priority
-        branding_score = 0
-        priority_map = {"CRITICAL": 4, "HIGH": 3, "MEDIUM": 2, "LOW": 1, "NONE": 0}
-        for train in trainsets:
+                    if cert_data.get("status", "VALID") in CERTIFICATE_ISSUES:
+                        issues += 1
+            cert_issues.append(issues)
+            
             branding = train.get("branding", {})
+            weight = 0
             if isinstance(branding, dict):
-                priority = branding.get("exposure_priority", "NONE")
-                branding_score += priority_map.get(priority, 0)
-        features["branding_priority_sum"] = branding_score
+                weight = PRIORITY_WEIGHTS.get(branding.get("exposure_priority", "NONE"), 0)
+            priority.append(weight)
         
-        # Time features
-        try:
-            generated_at = datetime.fromisoformat(
-                schedule.get("generated_at", "").replace("+05:30", "")
-            )
-            features["time_of_day"] = generated_at.hour
-            features["day_of_week"] = generated_at.weekday()
-        except:
-            features["time_of_day"] = 12
-            features["day_of_week"] = 0
-        
-        return features
+        return status, readiness, mileage, cert_issues, priority
+    
+    @staticmethod
+    def extract_from_schedule(schedule: Dict) -> Dict[str, float]:
+        """Extract features from a single schedule"""
+        trainsets = schedule.get("trainsets", [])
+        row = aggregate_schedule(*FeatureExtractor._encode_trainsets(trainsets))
+        
+        time_of_day, day_of_week = FeatureExtractor._time_features(schedule)
+        
+        return {
+            "num_trains": int(row[OUT_NUM_TRAINS]),
+            "num_available": int(row[OUT_NUM_AVAILABLE]),
+            "maintenance_count": int(row[OUT_MAINTENANCE_COUNT]),
+            "avg_readiness_score": float(row[OUT_AVG_READINESS]),
+            "min_readiness_score": float(row[OUT_MIN_READINESS]),
+            "total_mileage": float(row[OUT_TOTAL_MILEAGE]),
+            "avg_mileage": float(row[OUT_AVG_MILEAGE]),
+            "mileage_variance": float(row[OUT_MILEAGE_VARIANCE]),
+            "certificate_expiry_count": int(row[OUT_CERTIFICATE_ISSUES]),
+            "branding_priority_sum": int(row[OUT_BRANDING_PRIORITY]),
+            "time_of_day": time_of_day,
+            "day_of_week": day_of_week,
+        }
+    
+    @staticmethod
+    def extract_into(schedule: Dict, out: np.ndarray, row_idx: int):
+        """Write a schedule's features into ``out[row_idx]`` by column index"""
+        trainsets = schedule.get("trainsets", [])
+        row = aggregate_schedule(*FeatureExtractor._encode_trainsets(trainsets))
+        
+        out[row_idx] = 0.0
+        out[row_idx, _KERNEL_COLS] = row[_KERNEL_OUTS]
+        time_of_day, day_of_week = FeatureExtractor._time_features(schedule)
+        if COL_TIME_OF_DAY is not None:
+            out[row_idx, COL_TIME_OF_DAY] = time_of_day
+        if COL_DAY_OF_WEEK is not None:
+            out[row_idx, COL_DAY_OF_WEEK] = day_of_week
     
     @staticmethod
     def calculate_target(schedule: Dict) -> float:
@@ -115,25 +189,168 @@ class FeatureExtractor:
         
         return min(100.0, score)
     
-    def prepare_dataset(self, schedules: List[Dict]) -> Tuple[np.ndarray, np.ndarray]:
-        """Prepare feature matrix and target vector"""
-        X = []
-        y = []
+    @staticmethod
+    def _time_features(schedule: Dict) -> Tuple[int, int]:
+        """Hour of day and weekday of schedule generation (local to its offset)"""
+        generated_at = _parse_iso_fast(schedule.get("generated_at"))
+        if generated_at is None:
+            return 12, 0
+        return generated_at.hour, generated_at.weekday()
+    
+    def flatten_schedules(self, schedules: List[Dict]) -> Dict[str, np.ndarray]:
+        """Unpack all trainsets into flat per-train arrays (SoA layout).
+        
+        Trains of the ``i``-th kept schedule occupy
+        ``schedule_offsets[i]:schedule_offsets[i + 1]``. Schedules that fail to
+        parse are skipped; ``valid`` marks which inputs were kept.
+        """
+        readiness: List[float] = []
+        mileage: List[float] = []
+        status_codes: List[int] = []
+        priority_codes: List[int] = []
+        cert_issues: List[int] = []
+        offsets = [0]
+        targets: List[float] = []
+        time_of_day: List[int] = []
+        day_of_week: List[int] = []
+        valid = np.zeros(len(schedules), dtype=bool)
         
-        for schedule_data in schedules:
+        for i, schedule_data in enumerate(schedules):
             schedule = schedule_data.get("schedule", schedule_data)
             
             try:
-                features = self.extract_from_schedule(schedule)
-                target = self.calculate_target(schedule)
-                
-                # Convert to feature vector in correct order
-                feature_vector = [features.get(f, 0.0) for f in CONFIG.FEATURES] # type: ignore
+                (train_status, train_readiness, train_mileage,
+                 train_certs, train_priority) = self._encode_trainsets(
+                    schedule.get("trainsets", [])
+                )
                 
-                X.append(feature_vector)
-                y.append(target)
+                target = self.calculate_target(schedule)
+                hour, weekday = self._time_features(schedule)
             except Exception as e:
                 print(f"Error extracting features: {e}")
                 continue
+            
+            readiness.extend(train_readiness)
+            mileage.extend(train_mileage)
+            status_codes.extend(train_status)
+            priority_codes.extend(train_priority)
+            cert_issues.extend(train_certs)
+            offsets.append(len(readiness))
+            targets.append(target)
+            time_of_day.append(hour)
+            day_of_week.append(weekday)
+            valid[i] = True
+        
+        return {
+            "readiness": np.asarray(readiness, dtype=np.float64),
+            "mileage": np.asarray(mileage, dtype=np.float64),
+            "status_codes": np.asarray(status_codes, dtype=np.int8),
+            "priority_codes": np.asarray(priority_codes, dtype=np.int8),
+            "cert_issues": np.asarray(cert_issues, dtype=np.int64),
+            "schedule_offsets": np.asarray(offsets, dtype=np.int64),
+            "targets": np.asarray(targets, dtype=np.float64),
+            "time_of_day": np.asarray(time_of_day, dtype=np.float64),
+            "day_of_week": np.asarray(day_of_week, dtype=np.float64),
+            "valid": valid,
+        }
+    
+    def prepare_dataset(self, schedules: List[Dict]) -> Tuple[np.ndarray, np.ndarray]:
+        """Prepare feature matrix and target vector"""
+        X, y, _ = self.prepare_rows(schedules)
+        return X, y
+    
+    @staticmethod
+    def features_from_soa(arrays: Dict[str, np.ndarray]) -> np.ndarray:
+        """Feature matrix for schedules already flattened to per-train arrays
+        
+        ``arrays`` uses the keys of ``flatten_schedules`` (``status_codes``,
+        ``readiness``, ``mileage``, ``cert_issues``, ``priority_codes``,
+        ``schedule_offsets`` and optionally ``time_of_day``/``day_of_week``),
+        so callers scoring many candidates skip building per-schedule dicts.
+        """
+        X = build_feature_matrix(
+            arrays["status_codes"], arrays["readiness"], arrays["mileage"],
+            arrays["cert_issues"], arrays["priority_codes"], arrays["schedule_offsets"],
+            KERNEL_COLUMN_OF_OUTPUT, NUM_FEATURES
+        )
+        if COL_TIME_OF_DAY is not None:
+            X[:, COL_TIME_OF_DAY] = arrays.get("time_of_day", 12)
+        if COL_DAY_OF_WEEK is not None:
+            X[:, COL_DAY_OF_WEEK] = arrays.get("day_of_week", 0)
+        return X
+    
+    def feature_rows(self, schedules: List[Dict]) -> np.ndarray:
+        """Float32 rows of ``CONFIG.FEATURES`` followed by the target
+        
+        Schedules that fail to extract get an all-NaN row so rows stay aligned
+        with the input. Used for the on-disk feature mirror.
+        """
+        X, y, valid = self._compute_rows(schedules)
+        rows = np.full((len(schedules), NUM_FEATURES + 1), np.nan, dtype=np.float32)
+        rows[valid, :-1] = X
+        rows[valid, -1] = y
+        return rows
+    
+    @staticmethod
+    def _cache_key(schedule_data: Dict) -> Optional[str]:
+        """Memoization key for a stored schedule, None if it was never saved"""
+        schedule = schedule_data.get("schedule", schedule_data)
+        schedule_id = schedule.get("schedule_id")
+        saved_at = schedule_data.get("saved_at")
+        if not schedule_id or not saved_at:
+            return None
+        return f"{schedule_id}|{saved_at}"
+    
+    def _remember(self, key: str, row: np.ndarray, target: float):
+        self._row_cache[key] = (row, target)
+        self._row_cache.move_to_end(key)
+        if len(self._row_cache) > self.max_cached:
+            self._row_cache.popitem(last=False)
+    
+    def prepare_rows(self, schedules: List[Dict]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Prepare features and targets plus a mask of which schedules produced a row
+        
+        Previously seen schedules are served from the memo; only the rest are
+        extracted.
+        """
+        keys = [self._cache_key(s) for s in schedules]
+        rows: List[Optional[Tuple[np.ndarray, float]]] = [None] * len(schedules)
+        
+        for i, key in enumerate(keys):
+            if key is not None and key in self._row_cache:
+                rows[i] = self._row_cache[key]
+                self._row_cache.move_to_end(key)
+        
+        misses = [i for i, row in enumerate(rows) if row is None]
+        X_miss, y_miss, valid_miss = self._compute_rows([schedules[i] for i in misses])
+        
+        computed = iter(zip(X_miss, y_miss))
+        valid = np.ones(len(schedules), dtype=bool)
+        for i, ok in zip(misses, valid_miss):
+            if not ok:
+                valid[i] = False
+                continue
+            row, target = next(computed)
+            row = row.copy()
+            rows[i] = (row, float(target))
+            key = keys[i]
+            if key is not None:
+                self._remember(key, row, float(target))
+        
+        kept = [row for row in rows if row is not None]
+        X = np.empty((len(kept), NUM_FEATURES))
+        y = np.empty(len(kept))
+        for i, (row, target) in enumerate(kept):
+            X[i] = row
+            y[i] = target
+        
+        return X, y, valid
+    
+    def _compute_rows(self, schedules: List[Dict]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Feature extraction for schedules not found in the memo
         
-        return np.array(X), np.array(y)
+        Uses the same aggregation kernel as ``features_from_soa`` and
+        ``extract_from_schedule``, so training and serving rows agree.
+        """
+        flat = self.flatten_schedules(schedules)
+        return self.features_from_soa(flat), flat["targets"], flat["valid"]
@@ -0,0 +1,213 @@
+"""
+Compiled Kernels for Feature Extraction
+Per-schedule aggregation over integer-encoded trainset arrays
+"""
+import numpy as np
+
+# Compiled kernels are cached next to this module (cache=True); deployments
+# where that is read-only set NUMBA_CACHE_DIR (see the Dockerfile)
+try:
+    from numba import njit, types
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+# Closed vocabularies used to encode per-train categorical fields as ints
+STATUS_VOCAB = (
+    "CLEANING",
+    "MAINTENANCE",
+    "OUT_OF_SERVICE",
+    "REVENUE_SERVICE",
+    "STANDBY",
+    "UNKNOWN",
+)
+STATUS_CODES = {status: code for code, status in enumerate(STATUS_VOCAB)}
+STATUS_UNKNOWN = STATUS_CODES["UNKNOWN"]
+STATUS_REVENUE = STATUS_CODES["REVENUE_SERVICE"]
+STATUS_STANDBY = STATUS_CODES["STANDBY"]
+STATUS_MAINTENANCE = STATUS_CODES["MAINTENANCE"]
+
+# Status categories as lookup tables indexed by status code (branchless counts)
+STATUS_IS_AVAILABLE = np.zeros(len(STATUS_VOCAB), dtype=np.int8)
+STATUS_IS_AVAILABLE[[STATUS_REVENUE, STATUS_STANDBY]] = 1
+STATUS_IS_MAINTENANCE = np.zeros(len(STATUS_VOCAB), dtype=np.int8)
+STATUS_IS_MAINTENANCE[STATUS_MAINTENANCE] = 1
+
+PRIORITY_WEIGHTS = {"CRITICAL": 4, "HIGH": 3, "MEDIUM": 2, "LOW": 1, "NONE": 0}
+CERTIFICATE_ISSUES = frozenset(("EXPIRED", "EXPIRING_SOON"))
+
+# Slots of the aggregate output row
+OUT_NUM_TRAINS = 0
+OUT_NUM_AVAILABLE = 1
+OUT_MAINTENANCE_COUNT = 2
+OUT_AVG_READINESS = 3
+OUT_MIN_READINESS = 4
+OUT_TOTAL_MILEAGE = 5
+OUT_AVG_MILEAGE = 6
+OUT_MILEAGE_VARIANCE = 7
+OUT_CERTIFICATE_ISSUES = 8
+OUT_BRANDING_PRIORITY = 9
+NUM_OUTPUTS = 10
+
+
+def _aggregate_py(status, readiness, mileage, cert_expired, priority, out):
+    """NumPy implementation of the schedule aggregate (no numba)"""
+    n = len(status)
+    out[:] = 0.0
+    out[OUT_NUM_TRAINS] = n
+    if n == 0:
+        return
+
+    out[OUT_NUM_AVAILABLE] = STATUS_IS_AVAILABLE[status].sum()
+    out[OUT_MAINTENANCE_COUNT] = STATUS_IS_MAINTENANCE[status].sum()
+    out[OUT_AVG_READINESS] = readiness.mean()
+    out[OUT_MIN_READINESS] = readiness.min()
+    # Variance from deviations about the mean, like the kernel's Welford update
+    mileage_sum = mileage.sum()
+    mileage_mean = mileage_sum / n
+    out[OUT_TOTAL_MILEAGE] = mileage_sum
+    out[OUT_AVG_MILEAGE] = mileage_mean
+    out[OUT_MILEAGE_VARIANCE] = np.square(mileage - mileage_mean).sum() / n
+    out[OUT_CERTIFICATE_ISSUES] = cert_expired.sum()
+    out[OUT_BRANDING_PRIORITY] = priority.sum()
+
+
+if NUMBA_AVAILABLE:
+    @njit(
+        types.void(
+            types.int8[:],
+            types.float64[:],
+            types.float64[:],
+            types.int64[:],
+            types.int8[:],
+            types.float64[:],
+        ),
+        cache=True,
+    )
+    def _aggregate(status, readiness, mileage, cert_expired, priority, out):
+        """Reduce one schedule's trainset arrays into ``out``"""
+        n = status.shape[0]
+        for i in range(out.shape[0]):
+            out[i] = 0.0
+        out[OUT_NUM_TRAINS] = n
+        if n == 0:
+            return
+
+        num_available = 0
+        maintenance = 0
+        readiness_sum = 0.0
+        readiness_min = readiness[0]
+        mileage_sum = 0.0
+        mileage_mean = 0.0
+        squared = 0.0
+        cert_sum = 0
+        priority_sum = 0
+        for i in range(n):
+            code = status[i]
+            num_available += STATUS_IS_AVAILABLE[code]
+            maintenance += STATUS_IS_MAINTENANCE[code]
+            readiness_sum += readiness[i]
+            if readiness[i] < readiness_min:
+                readiness_min = readiness[i]
+            # Welford update: mean and squared deviations in the same pass
+            mileage_sum += mileage[i]
+            delta = mileage[i] - mileage_mean
+            mileage_mean += delta / (i + 1)
+            squared += delta * (mileage[i] - mileage_mean)
+            cert_sum += cert_expired[i]
+            priority_sum += priority[i]
+
+        out[OUT_NUM_AVAILABLE] = num_available
+        out[OUT_MAINTENANCE_COUNT] = maintenance
+        out[OUT_AVG_READINESS] = readiness_sum / n
+        out[OUT_MIN_READINESS] = readiness_min
+        out[OUT_TOTAL_MILEAGE] = mileage_sum
+        out[OUT_AVG_MILEAGE] = mileage_mean
+        out[OUT_MILEAGE_VARIANCE] = squared / n
+        out[OUT_CERTIFICATE_ISSUES] = cert_sum
+        out[OUT_BRANDING_PRIORITY] = priority_sum
+
+    @njit(
+        types.void(
+            types.int8[:],
+            types.float64[:],
+            types.float64[:],
+            types.int64[:],
+            types.int8[:],
+            types.int64[:],
+            types.int64[:],
+            types.float64[:, :],
+        ),
+        cache=True,
+    )
+    def _build_matrix(status, readiness, mileage, cert_expired, priority, offsets, columns, out):
+        """Aggregate every schedule of a flattened batch into its ``out`` row
+        
+        Serial on purpose: this runs on API request threads, and numba's
+        default workqueue threading layer aborts on concurrent parallel
+        launches.
+        """
+        for s in range(offsets.shape[0] - 1):
+            start = offsets[s]
+            end = offsets[s + 1]
+            row = np.empty(NUM_OUTPUTS, dtype=np.float64)
+            _aggregate(
+                status[start:end], readiness[start:end], mileage[start:end],
+                cert_expired[start:end], priority[start:end], row
+            )
+            for k in range(NUM_OUTPUTS):
+                if columns[k] >= 0:
+                    out[s, columns[k]] = row[k]
+else:
+    _aggregate = _aggregate_py
+    
+    def _build_matrix(status, readiness, mileage, cert_expired, priority, offsets, columns, out):
+        """Aggregate every schedule of a flattened batch into its ``out`` row"""
+        row = np.empty(NUM_OUTPUTS, dtype=np.float64)
+        present = columns >= 0
+        for s in range(len(offsets) - 1):
+            segment = slice(offsets[s], offsets[s + 1])
+            _aggregate_py(
+                status[segment], readiness[segment], mileage[segment],
+                cert_expired[segment], priority[segment], row
+            )
+            out[s, columns[present]] = row[present]
+
+
+def build_feature_matrix(
+    status, readiness, mileage, cert_expired, priority, offsets, columns, num_features: int
+) -> np.ndarray:
+    """Aggregate a flattened (SoA) batch of schedules straight into a feature matrix
+    
+    Trains of schedule ``s`` occupy ``offsets[s]:offsets[s + 1]`` of the
+    per-train arrays. ``columns[k]`` is the matrix column receiving aggregate
+    slot ``k`` (-1 to drop it); columns not fed by a slot are left at 0.
+    """
+    offsets = np.ascontiguousarray(offsets, dtype=np.int64)
+    out = np.zeros((len(offsets) - 1, num_features), dtype=np.float64)
+    _build_matrix(
+        np.ascontiguousarray(status, dtype=np.int8),
+        np.ascontiguousarray(readiness, dtype=np.float64),
+        np.ascontiguousarray(mileage, dtype=np.float64),
+        np.ascontiguousarray(cert_expired, dtype=np.int64),
+        np.ascontiguousarray(priority, dtype=np.int8),
+        offsets,
+        np.ascontiguousarray(columns, dtype=np.int64),
+        out,
+    )
+    return out
+
+
+def aggregate_schedule(status, readiness, mileage, cert_expired, priority) -> np.ndarray:
+    """Aggregate encoded trainset fields into a ``NUM_OUTPUTS`` row"""
+    out = np.empty(NUM_OUTPUTS, dtype=np.float64)
+    _aggregate(
+        np.ascontiguousarray(status, dtype=np.int8),
+        np.ascontiguousarray(readiness, dtype=np.float64),
+        np.ascontiguousarray(mileage, dtype=np.float64),
+        np.ascontiguousarray(cert_expired, dtype=np.int64),
+        np.ascontiguousarray(priority, dtype=np.int8),
+        out,
+    )
+    return out
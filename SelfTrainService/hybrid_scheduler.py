@@ -2,33 +2,125 @@
 Hybrid Scheduler - Combines ML and Optimization
 Uses ML when confident, falls back to optimization
 """
-from typing import Dict, Optional, Tuple
+import threading
+from collections import deque
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional, Tuple
 from datetime import datetime
+import time
 
 from .config import CONFIG
-from .trainer import ModelTrainer
+from .trainer import ModelTrainer, get_shared_trainer
+
+
+class _MicroBatcher:
+    """Coalesce concurrent single-item calls into one batch call
+    
+    A lone queued item is handed to ``batch_fn`` straight away. When several
+    are waiting, they open a window of ``max_delay`` seconds (closed early
+    once ``max_batch`` items are waiting); everything queued by then is
+    handed to ``batch_fn`` together. Items submitted while a batch runs
+    queue up for the next one.
+    """
+    
+    def __init__(self, batch_fn: Callable[[List], List], max_delay: float = 0.01, max_batch: int = 256):
+        self.batch_fn = batch_fn
+        self.max_delay = max_delay
+        self.max_batch = max_batch
+        self._pending: deque = deque()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+    
+    def submit(self, item):
+        """Queue one item and block until its batch has been processed"""
+        future: Future = Future()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Batcher is closed")
+            self._pending.append((item, future))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+            self._cond.notify()
+        return future.result()
+    
+    def close(self):
+        """Process the items already queued, then stop and join the worker thread"""
+        with self._cond:
+            self._closed = True
+            thread = self._thread
+            self._cond.notify_all()
+        if thread is not None:
+            thread.join()
+    
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if not self._pending:
+                    return
+                
+                if len(self._pending) > 1:
+                    deadline = time.monotonic() + self.max_delay
+                    while len(self._pending) < self.max_batch and not self._closed:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        self._cond.wait(remaining)
+                
+                batch = [self._pending.popleft() for _ in range(min(len(self._pending), self.max_batch))]
+            
+            items = [item for item, _ in batch]
+            try:
+                results = self.batch_fn(items)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
 
 
 class HybridScheduler:
     """Combine ML predictions with optimization algorithms"""
     
-    def __init__(self):
-        self.trainer = ModelTrainer()
-        self.trainer.load_model()
+    def __init__(self, trainer: Optional[ModelTrainer] = None):
+        self.trainer = trainer or get_shared_trainer()
+        self._batcher = _MicroBatcher(self.should_use_ml_batch)
+    
+    def close(self):
+        """Stop the thread that batches concurrent ``should_use_ml`` calls"""
+        self._batcher.close()
     
     def should_use_ml(self, features: Dict[str, float]) -> Tuple[bool, float]:
-        """Determine if ML should be used based on confidence"""
+        """Determine if ML should be used based on confidence
+        
+        Concurrent callers are scored together in one batch predict.
+        """
         if not CONFIG.USE_HYBRID:
             return False, 0.0
         
         if not self.trainer.models:
             return False, 0.0
         
-        # Get prediction and confidence
-        _, confidence = self.trainer.predict(features)
+        return self._batcher.submit(features)
+    
+    def should_use_ml_batch(self, features_list: List[Dict[str, float]]) -> List[Tuple[bool, float]]:
+        """Determine ML usage for many feature dicts with one predict per model"""
+        if not features_list:
+            return []
+        
+        if not CONFIG.USE_HYBRID or not self.trainer.models:
+            return [(False, 0.0)] * len(features_list)
+        
+        # Get predictions and confidences
+        _, confidences = self.trainer.predict_batch(features_list)
         
-        use_ml = confidence >= CONFIG.ML_CONFIDENCE_THRESHOLD
-        return use_ml, confidence
+        threshold = CONFIG.ML_CONFIDENCE_THRESHOLD
+        return [(bool(c >= threshold), float(c)) for c in confidences]
     
     def get_schedule_recommendation(
         self,
@@ -38,10 +130,11 @@ class HybridScheduler:
         """Get scheduling recommendation with method selection"""
         
         # Extract basic features from request
+        now = datetime.now()
         features = {
             "num_trains": schedule_request.get("num_trains", 25),
-            "time_of_day": datetime.now().hour,
-            "day_of_week": datetime.now().weekday(),
+            "time_of_day": now.hour,
+            "day_of_week": now.weekday(),
         }
         
         # Determine which method to use
@@ -2,22 +2,72 @@
 Automatic Retraining Service
 Background service that retrains model on schedule
 """
-import time
+import os
 import threading
+import time
 from datetime import datetime, timedelta
 from typing import Optional
+
 from .config import CONFIG
-from .trainer import ModelTrainer
+from .trainer import ModelTrainer, get_shared_trainer
+from .data_store import is_archive_name, is_legacy_name
+
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+    WATCHDOG_AVAILABLE = True
+except ImportError:
+    WATCHDOG_AVAILABLE = False
+    Observer = None
+    FileSystemEventHandler = object
+
+
+class _ScheduleEventHandler(FileSystemEventHandler):  # type: ignore
+    """Forward schedule file events to the retraining service"""
+    
+    def __init__(self, service: "RetrainingService"):
+        super().__init__()
+        self.service = service
+    
+    def _name(self, event) -> str:
+        return "" if event.is_directory else os.path.basename(str(event.src_path))
+    
+    def on_created(self, event):
+        if is_legacy_name(self._name(event)):
+            self.service._on_new_schedule()
+    
+    def on_modified(self, event):
+        name = self._name(event)
+        if is_archive_name(name):
+            # Every save appends one line to the current archive
+            self.service._on_new_schedule()
+        elif is_legacy_name(name):
+            # Files are created before their content is written
+            self.service._ingest_wake.set()
 
 
 class RetrainingService:
     """Background service for automatic model retraining"""
     
     def __init__(self, trainer: Optional[ModelTrainer] = None):
-        self.trainer = trainer or ModelTrainer()
+        self.trainer = trainer or get_shared_trainer()
+        # The trainer reads its dataset from this cache when retraining
+        self.feature_cache = self.trainer.feature_cache
         self.running = False
         self.thread = None
         self.check_interval_minutes = 60  # Check every hour
+        
+        # Woken early by stop() or once enough new schedules have arrived
+        self._wake = threading.Event()
+        self._new_count = 0
+        self._count_lock = threading.Lock()
+        self._observer = None
+        
+        # Ingestion runs beside training: the ingest thread keeps the feature
+        # cache current, so the next retrain only has to read it back
+        self._ingest_wake = threading.Event()
+        self._ingest_thread = None
+        self.ingest_debounce_seconds = 1.0
     
     def start(self):
         """Start the retraining service"""
@@ -26,6 +76,12 @@ class RetrainingService:
             return
         
         self.running = True
+        self._wake.clear()
+        self._start_observer()
+        if self._observer:
+            self._ingest_wake.set()
+            self._ingest_thread = threading.Thread(target=self._ingest_loop, daemon=True)
+            self._ingest_thread.start()
         self.thread = threading.Thread(target=self._run_loop, daemon=True)
         self.thread.start()
         
@@ -35,13 +91,63 @@ class RetrainingService:
     def stop(self):
         """Stop the retraining service"""
         self.running = False
+        self._wake.set()
+        self._ingest_wake.set()
+        if self._ingest_thread:
+            self._ingest_thread.join(timeout=5)
+            self._ingest_thread = None
+        if self._observer:
+            self._observer.stop()
+            self._observer.join(timeout=5)
+            self._observer = None
         if self.thread:
             self.thread.join(timeout=5)
         print("Retraining service stopped")
     
+    def _start_observer(self):
+        """Watch the data directory for new schedules (requires watchdog)"""
+        if not WATCHDOG_AVAILABLE:
+            return
+        
+        self._observer = Observer()
+        self._observer.schedule(
+            _ScheduleEventHandler(self),
+            str(self.trainer.data_store.data_dir),
+            recursive=False
+        )
+        self._observer.daemon = True
+        self._observer.start()
+    
+    def _on_new_schedule(self):
+        """Count a new schedule, waking the loop once a retrain may be due"""
+        self._ingest_wake.set()
+        with self._count_lock:
+            self._new_count += 1
+            if self._new_count >= CONFIG.MIN_SCHEDULES_FOR_RETRAIN:
+                self._wake.set()
+    
+    def _ingest_loop(self):
+        """Extract features for new schedules while the trainer is busy"""
+        while self.running:
+            self._ingest_wake.wait()
+            if not self.running:
+                break
+            
+            # Let a burst of saves settle before re-scanning
+            time.sleep(self.ingest_debounce_seconds)
+            self._ingest_wake.clear()
+            
+            try:
+                self.feature_cache.refresh()
+            except Exception as e:
+                print(f"Error in feature ingestion: {e}")
+    
     def _run_loop(self):
         """Main loop for retraining service"""
         while self.running:
+            with self._count_lock:
+                self._new_count = 0
+            
             try:
                 # Check if retraining is needed
                 if self.trainer.should_retrain():
@@ -65,11 +171,9 @@ class RetrainingService:
             except Exception as e:
                 print(f"Error in retraining loop: {e}")
             
-            # Sleep until next check
-            for _ in range(self.check_interval_minutes * 60):
-                if not self.running:
-                    break
-                time.sleep(1)
+            # Sleep until next check, new data or stop()
+            self._wake.wait(timeout=self.check_interval_minutes * 60)
+            self._wake.clear()
     
     def force_retrain(self):
         """Force immediate retraining"""
@@ -4,8 +4,8 @@ Retrains models every 48 hours
 """
 import sys
 from pathlib import Path
-import time
 import signal
+import threading
 
 # Add parent directory to path
 parent_dir = str(Path(__file__).parent.parent)
@@ -15,15 +15,14 @@ if parent_dir not in sys.path:
 from SelfTrainService.retraining_service import start_retraining_service
 from SelfTrainService.config import CONFIG
 
-# Global flag for graceful shutdown
-running = True
+# Set by the signal handler; the main thread blocks on it until shutdown
+shutdown = threading.Event()
 
 
 def signal_handler(sig, frame):
     """Handle shutdown signals"""
-    global running
     print("\n\nReceived shutdown signal. Stopping retraining service...")
-    running = False
+    shutdown.set()
 
 
 def main():
@@ -46,10 +45,9 @@ def main():
     # Start the service
     start_retraining_service()
     
-    # Keep main thread alive
+    # Keep main thread alive; the wait wakes as soon as a signal arrives
     try:
-        while running:
-            time.sleep(1)
+        shutdown.wait()
     except KeyboardInterrupt:
         print("\n\nShutting down...")
     
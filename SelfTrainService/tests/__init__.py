@@ -0,0 +1 @@
+"""Tests for self-training service"""
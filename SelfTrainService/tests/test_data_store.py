@@ -0,0 +1,266 @@
+"""
+Unit tests for schedule data storage
+"""
+import json
+import os
+from datetime import datetime, timedelta, timezone
+
+from ..data_store import ScheduleDataStore
+
+
+def write_schedule(data_dir, name, schedule_id, mtime=None):
+    """Write a stored-schedule file directly"""
+    path = data_dir / name
+    path.write_text(json.dumps({"schedule": {"schedule_id": schedule_id}, "metadata": {}}))
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+    return path
+
+
+def test_load_schedules_newest_first(tmp_path):
+    """Test schedules load in reverse filename order"""
+    store = ScheduleDataStore(str(tmp_path))
+    for i in range(5):
+        write_schedule(tmp_path, f"S{i}_20250101_00000{i}.json", f"S{i}")
+    (tmp_path / "notes.txt").write_text("ignored")
+    
+    ids = [s["schedule"]["schedule_id"] for s in store.load_schedules()]
+    assert ids == ["S4", "S3", "S2", "S1", "S0"]
+    
+    ids = [s["schedule"]["schedule_id"] for s in store.load_schedules(limit=2)]
+    assert ids == ["S4", "S3"]
+
+
+def test_count_schedules(tmp_path):
+    """Test counting only schedule files"""
+    store = ScheduleDataStore(str(tmp_path))
+    assert store.count_schedules() == 0
+    
+    write_schedule(tmp_path, "A.json", "A")
+    write_schedule(tmp_path, "B.json", "B")
+    (tmp_path / "sub.json").mkdir()
+    assert store.count_schedules() == 2
+
+
+def test_get_schedules_since(tmp_path):
+    """Test filtering schedules by modification time"""
+    store = ScheduleDataStore(str(tmp_path))
+    now = datetime.now()
+    write_schedule(tmp_path, "old.json", "old", mtime=(now - timedelta(days=2)).timestamp())
+    write_schedule(tmp_path, "new.json", "new", mtime=now.timestamp())
+    
+    recent = store.get_schedules_since(now - timedelta(days=1))
+    assert [s["schedule"]["schedule_id"] for s in recent] == ["new"]
+
+
+def test_clear_old_schedules(tmp_path):
+    """Test only the newest schedules are kept"""
+    store = ScheduleDataStore(str(tmp_path))
+    for i in range(4):
+        write_schedule(tmp_path, f"S_{i}.json", f"S{i}")
+    
+    store.clear_old_schedules(keep_count=2)
+    
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["S_2.json", "S_3.json"]
+
+
+def test_save_and_load_round_trip(tmp_path):
+    """Test saved schedules load back, including numpy and datetime values"""
+    import numpy as np
+    
+    store = ScheduleDataStore(str(tmp_path))
+    schedule = {
+        "schedule_id": "KMRL-TEST",
+        "generated_at": datetime(2025, 1, 15, 8, 30),
+        "scores": np.array([0.5, 0.75]),
+        "count": np.int64(3),
+    }
+    path = store.save_schedule(schedule, {"quality_score": 81.5})
+    
+    assert os.path.exists(path)
+    loaded = store.load_schedules()
+    assert len(loaded) == 1
+    assert loaded[0]["schedule"]["schedule_id"] == "KMRL-TEST"
+    assert loaded[0]["schedule"]["generated_at"] == "2025-01-15T08:30:00"
+    assert loaded[0]["schedule"]["scores"] == [0.5, 0.75]
+    assert loaded[0]["schedule"]["count"] == 3
+    assert loaded[0]["metadata"]["quality_score"] == 81.5
+
+
+def test_load_schedules_skips_unreadable_files(tmp_path):
+    """Test corrupt files are skipped without breaking ordering"""
+    store = ScheduleDataStore(str(tmp_path))
+    for i in range(6):
+        write_schedule(tmp_path, f"S{i}.json", f"S{i}")
+    (tmp_path / "S3.json").write_text("{not json")
+    
+    ids = [s["schedule"]["schedule_id"] for s in store.load_schedules()]
+    assert ids == ["S5", "S4", "S2", "S1", "S0"]
+
+
+def test_archive_save_load_count(tmp_path):
+    """Test schedules are appended to a monthly archive and read back newest first"""
+    store = ScheduleDataStore(str(tmp_path))
+    paths = {store.save_schedule({"schedule_id": f"S{i}"}) for i in range(3)}
+    write_schedule(tmp_path, "LEGACY.json", "LEGACY")
+    
+    assert len(paths) == 1
+    archive = paths.pop()
+    assert os.path.basename(archive).startswith("schedules-")
+    assert archive.endswith(".jsonl")
+    
+    ids = [s["schedule"]["schedule_id"] for s in store.load_schedules()]
+    assert ids == ["S2", "S1", "S0", "LEGACY"]
+    assert [s["schedule"]["schedule_id"] for s in store.load_schedules(limit=2)] == ["S2", "S1"]
+    assert store.count_schedules() == 4
+
+
+def test_count_schedules_reads_index_and_skips_blank_lines(tmp_path, monkeypatch):
+    """Test counts come from the mirror index and match read_archive when stale"""
+    from .. import data_store
+    store = ScheduleDataStore(str(tmp_path))
+    archive = None
+    for i in range(3):
+        archive = store.save_schedule({"schedule_id": f"S{i}"})
+    
+    def fail(path):
+        raise AssertionError(f"read {path}")
+    monkeypatch.setattr(data_store, "_count_records", fail)
+    assert store.count_schedules() == 3
+    monkeypatch.undo()
+    
+    # Blank and partial lines appended behind the store's back
+    with open(archive, "ab") as f:
+        f.write(b"\n  \n" + b'{"schedule": {"schedule_id"')
+    assert store.count_schedules() == 3
+    assert len(store.read_archive(archive)[0]) == 3
+    
+    store.clear_old_schedules(keep_count=2)
+    assert store.count_schedules() == 2
+    assert [s["schedule"]["schedule_id"] for s in store.load_schedules()] == ["S2", "S1"]
+
+
+def test_read_archive_incremental(tmp_path):
+    """Test archive reads resume from an offset and ignore a partial last line"""
+    store = ScheduleDataStore(str(tmp_path))
+    archive = store.save_schedule({"schedule_id": "S0"})
+    records, end = store.read_archive(archive)
+    assert [r["schedule"]["schedule_id"] for _, r in records] == ["S0"]
+    
+    store.save_schedule({"schedule_id": "S1"})
+    with open(archive, "ab") as f:
+        f.write(b'{"schedule": {"schedule_id"')
+    records, new_end = store.read_archive(archive, end)
+    assert [r["schedule"]["schedule_id"] for _, r in records] == ["S1"]
+    assert records[0][0] == end
+    assert new_end < os.path.getsize(archive)
+
+
+def test_archive_schedules_since_and_clear(tmp_path):
+    """Test saved_at filtering and trimming of archived schedules"""
+    store = ScheduleDataStore(str(tmp_path))
+    before = datetime.now() - timedelta(seconds=1)
+    for i in range(5):
+        store.save_schedule({"schedule_id": f"S{i}"})
+    
+    assert len(store.get_schedules_since(before)) == 5
+    assert store.get_schedules_since(datetime.now() + timedelta(hours=1)) == []
+    
+    store.clear_old_schedules(keep_count=2)
+    assert [s["schedule"]["schedule_id"] for s in store.load_schedules()] == ["S4", "S3"]
+    assert store.count_schedules() == 2
+
+
+def test_schedules_since_accepts_aware_datetimes(tmp_path):
+    """Test naive saved_at values compare against a timezone-aware since"""
+    store = ScheduleDataStore(str(tmp_path))
+    before = datetime.now(timezone.utc) - timedelta(seconds=1)
+    store.save_schedule({"schedule_id": "S0"})
+    
+    assert len(store.get_schedules_since(before)) == 1
+    assert len(store.get_schedules_since(before.astimezone(timezone(timedelta(hours=5))))) == 1
+    assert store.get_schedules_since(datetime.now(timezone.utc) + timedelta(hours=1)) == []
+
+
+def _save_many(data_dir, count):
+    """Save ``count`` schedules from a separate process"""
+    from ..feature_extractor import FeatureExtractor
+    from .test_feature_extractor import make_schedule
+    store = ScheduleDataStore(str(data_dir), feature_extractor=FeatureExtractor())
+    for i in range(count):
+        store.save_schedule(make_schedule(f"P{os.getpid()}-{i}", 5))
+
+
+def make_store(tmp_path):
+    """Data store under tmp_path with a fresh feature extractor"""
+    from ..feature_extractor import FeatureExtractor
+    data_dir = tmp_path / "schedules"
+    extractor = FeatureExtractor()
+    return ScheduleDataStore(str(data_dir), feature_extractor=extractor), data_dir
+
+
+def test_feature_mirror_matches_extraction(tmp_path):
+    """Test the memory-mapped feature mirror matches extracting the archive"""
+    import numpy as np
+    from .test_feature_extractor import make_schedule
+    
+    store, _ = make_store(tmp_path)
+    assert store.load_features() is None
+    for i in range(4):
+        store.save_schedule(make_schedule(f"S{i}", 5 + i))
+    
+    X, y = store.load_features()
+    X_ref, y_ref = store.feature_extractor.prepare_dataset(store.load_schedules())
+    assert isinstance(X.base, np.memmap) or isinstance(X, np.memmap)
+    np.testing.assert_allclose(X, X_ref, rtol=1e-6)
+    np.testing.assert_allclose(y, y_ref, rtol=1e-6)
+
+
+def test_feature_mirror_rebuilds_and_trims(tmp_path):
+    """Test a stale mirror is rebuilt and trimming keeps the newest rows"""
+    from .test_feature_extractor import make_schedule
+    
+    store, data_dir = make_store(tmp_path)
+    archive = None
+    for i in range(3):
+        archive = store.save_schedule(make_schedule(f"S{i}", 5 + i))
+    
+    # Lines appended behind the store's back make the mirror stale
+    with open(archive, "ab") as f:
+        f.write(json.dumps({"schedule": make_schedule("S3", 10)}).encode() + b"\n")
+        f.write(b"{not json\n")
+    X, _ = store.load_features()
+    assert list(X[:, 0]) == [10, 7, 6, 5]
+    
+    store.clear_old_schedules(keep_count=3)
+    X, _ = store.load_features()
+    assert list(X[:, 0]) == [10, 7]
+    
+    # Legacy files are not mirrored and leave the archived rows as they are
+    write_schedule(data_dir, "LEGACY.json", "LEGACY")
+    X, _ = store.load_features()
+    assert list(X[:, 0]) == [10, 7]
+
+
+def test_saves_from_several_processes_keep_mirror_current(tmp_path):
+    """Test concurrent saves from other processes keep the mirror index current"""
+    import multiprocessing
+    import pytest
+    from .. import data_store
+    if not data_store.FLOCK_AVAILABLE:
+        pytest.skip("no flock on this platform")
+    
+    store, data_dir = make_store(tmp_path)
+    ctx = multiprocessing.get_context("fork")
+    procs = [ctx.Process(target=_save_many, args=(data_dir, 25)) for _ in range(3)]
+    for proc in procs:
+        proc.start()
+    for proc in procs:
+        proc.join(timeout=60)
+        assert proc.exitcode == 0
+    
+    sizes = store._archive_sizes()
+    assert store._mirror_counts(sizes) is not None
+    assert store.count_schedules() == 75
+    X, _ = store.load_features()
+    assert len(X) == 75
@@ -0,0 +1,137 @@
+"""
+Unit tests for the persistent feature cache
+"""
+import json
+import os
+
+import numpy as np
+
+from ..data_store import ScheduleDataStore
+from ..feature_cache import FeatureCache
+from ..feature_extractor import FeatureExtractor
+from .test_feature_extractor import make_schedule
+
+
+class CountingExtractor(FeatureExtractor):
+    """Extractor that records how many schedules it processed"""
+    
+    def __init__(self):
+        super().__init__()
+        self.extracted = 0
+    
+    def _compute_rows(self, schedules):
+        self.extracted += len(schedules)
+        return super()._compute_rows(schedules)
+
+
+def write(data_dir, name, num_trains):
+    path = data_dir / name
+    path.write_text(json.dumps({"schedule": make_schedule(name, num_trains)}))
+    return path
+
+
+def make_cache(tmp_path):
+    data_dir = tmp_path / "schedules"
+    store = ScheduleDataStore(str(data_dir))
+    extractor = CountingExtractor()
+    cache = FeatureCache(str(tmp_path / "features.npz"), store, extractor)
+    return data_dir, store, extractor, cache
+
+
+def test_cache_matches_full_extraction(tmp_path):
+    """Test cached dataset equals extracting every stored schedule"""
+    data_dir, store, extractor, cache = make_cache(tmp_path)
+    for i in range(4):
+        write(data_dir, f"S{i}.json", 10 + i)
+    
+    X, y = cache.load_dataset()
+    X_ref, y_ref = FeatureExtractor().prepare_dataset(store.load_schedules())
+    
+    np.testing.assert_allclose(X, X_ref)
+    np.testing.assert_allclose(y, y_ref)
+
+
+def test_cache_only_extracts_new_files(tmp_path):
+    """Test a second load only extracts changed and added files"""
+    data_dir, store, extractor, cache = make_cache(tmp_path)
+    for i in range(3):
+        write(data_dir, f"S{i}.json", 10 + i)
+    cache.load_dataset()
+    assert extractor.extracted == 3
+    
+    cache.load_dataset()
+    assert extractor.extracted == 3
+    
+    write(data_dir, "S3.json", 20)
+    changed = write(data_dir, "S0.json", 15)
+    os.utime(changed, ns=(1, 1))
+    X, _ = cache.load_dataset()
+    assert extractor.extracted == 5
+    assert len(X) == 4
+
+
+def test_cache_skips_unreadable_and_removed_files(tmp_path):
+    """Test invalid files yield no rows and removed files drop out"""
+    data_dir, store, extractor, cache = make_cache(tmp_path)
+    write(data_dir, "S0.json", 10)
+    removed = write(data_dir, "S1.json", 11)
+    (data_dir / "S2.json").write_text("{broken")
+    
+    X, y = cache.load_dataset()
+    assert len(X) == len(y) == 2
+    
+    removed.unlink()
+    X, y = cache.load_dataset()
+    assert len(X) == len(y) == 1
+    assert extractor.extracted == 2
+
+
+def test_cache_reads_archives_from_the_feature_mirror(tmp_path):
+    """Test archived rows come from the data store's mirror, legacy rows from shards"""
+    data_dir, store, extractor, cache = make_cache(tmp_path)
+    for i in range(3):
+        store.save_schedule(make_schedule(f"S{i}", 10 + i))
+    
+    X, y = cache.load_dataset()
+    assert isinstance(X.base, np.memmap) or isinstance(X, np.memmap)
+    assert extractor.extracted == 0
+    
+    write(data_dir, "LEGACY.json", 8)
+    X, y = cache.load_dataset()
+    X_ref, y_ref = FeatureExtractor().prepare_dataset(store.load_schedules())
+    np.testing.assert_allclose(X, X_ref, rtol=1e-6)
+    np.testing.assert_allclose(y, y_ref, rtol=1e-6)
+    assert extractor.extracted == 1
+    
+    store.save_schedule(make_schedule("S3", 20))
+    store.clear_old_schedules(keep_count=2)
+    X, _ = cache.load_dataset()
+    assert list(X[:, 0]) == [20, 12]
+    assert extractor.extracted == 1
+
+
+def test_cache_appends_shards_and_compacts(tmp_path):
+    """Test new rows go to a new shard and dropping rows compacts the shards"""
+    data_dir, store, extractor, cache = make_cache(tmp_path)
+    for i in range(3):
+        write(data_dir, f"S{i}.json", 10 + i)
+    cache.load_dataset()
+    write(data_dir, "S3.json", 20)
+    X, y = cache.load_dataset()
+    
+    shards = sorted(tmp_path.glob("features-*.npz"))
+    assert len(shards) == 2
+    with np.load(shards[0]) as a, np.load(shards[1]) as b:
+        assert sorted([len(a["valid"]), len(b["valid"])]) == [1, 3]
+    
+    # A fresh instance reassembles the same dataset from the shards
+    X_fresh, y_fresh = FeatureCache(str(tmp_path / "features.npz"), store, extractor).load_dataset()
+    np.testing.assert_array_equal(X_fresh, X)
+    np.testing.assert_array_equal(y_fresh, y)
+    assert extractor.extracted == 4
+    
+    (data_dir / "S0.json").unlink()
+    (data_dir / "S1.json").unlink()
+    X, _ = cache.load_dataset()
+    assert len(X) == 2
+    assert len(list(tmp_path.glob("features-*.npz"))) == 1
@@ -0,0 +1,156 @@
+"""
+Unit tests for feature extraction
+"""
+import numpy as np
+
+from ..config import CONFIG
+from ..feature_extractor import FeatureExtractor
+
+
+def make_schedule(schedule_id: str, num_trains: int, generated_at: str = "2025-01-15T08:30:00+05:30"):
+    """Build a minimal schedule dict with varied per-train fields"""
+    statuses = ["REVENUE_SERVICE", "STANDBY", "MAINTENANCE", "CLEANING", "OUT_OF_SERVICE"]
+    priorities = ["CRITICAL", "HIGH", "MEDIUM", "LOW", "NONE"]
+    trainsets = []
+    for i in range(num_trains):
+        trainsets.append({
+            "trainset_id": f"TS-{i:03d}",
+            "status": statuses[i % len(statuses)],
+            "readiness_score": 0.5 + (i % 5) * 0.1,
+            "cumulative_km": 100000 + i * 1375,
+            "fitness_certificates": {
+                "rolling_stock": {"status": "EXPIRED" if i % 7 == 0 else "VALID"},
+                "signalling": {"status": "EXPIRING_SOON" if i % 4 == 0 else "VALID"},
+            },
+            "branding": {"exposure_priority": priorities[i % len(priorities)]},
+        })
+    return {
+        "schedule_id": schedule_id,
+        "generated_at": generated_at,
+        "trainsets": trainsets,
+        "fleet_summary": {"availability_percent": 80.0},
+        "optimization_metrics": {
+            "avg_readiness_score": 0.8,
+            "mileage_variance_coefficient": 0.1,
+            "branding_sla_compliance": 0.9,
+            "fitness_expiry_violations": 1,
+        },
+    }
+
+
+def reference_dataset(schedules):
+    """Per-schedule reference built from extract_from_schedule"""
+    extractor = FeatureExtractor()
+    X, y = [], []
+    for data in schedules:
+        schedule = data.get("schedule", data)
+        features = extractor.extract_from_schedule(schedule)
+        X.append([features.get(f, 0.0) for f in CONFIG.FEATURES])
+        y.append(extractor.calculate_target(schedule))
+    return np.array(X, dtype=float), np.array(y, dtype=float)
+
+
+def test_prepare_dataset_matches_per_schedule_extraction():
+    """Test the training dataset matches per-schedule extraction exactly (one shared kernel)"""
+    schedules = [
+        {"schedule": make_schedule("S1", 25)},
+        make_schedule("S2", 30, generated_at="invalid"),
+        {"schedule": make_schedule("S3", 0)},
+        {"schedule": make_schedule("S4", 1)},
+    ]
+    X, y = FeatureExtractor().prepare_dataset(schedules)
+    X_ref, y_ref = reference_dataset(schedules)
+    
+    assert X.shape == (4, len(CONFIG.FEATURES))
+    np.testing.assert_array_equal(X, X_ref)
+    np.testing.assert_allclose(y, y_ref)
+
+
+def test_prepare_dataset_skips_invalid_schedules():
+    """Test schedules that fail to parse are dropped"""
+    bad = make_schedule("BAD", 3)
+    bad["trainsets"][1]["readiness_score"] = None
+    schedules = [make_schedule("S1", 5), bad, make_schedule("S2", 6)]
+    
+    X, y = FeatureExtractor().prepare_dataset(schedules)
+    
+    assert X.shape[0] == 2
+    assert y.shape == (2,)
+    assert list(X[:, CONFIG.FEATURES.index("num_trains")]) == [5, 6]
+
+
+def test_prepare_dataset_empty():
+    """Test empty input produces empty arrays"""
+    X, y = FeatureExtractor().prepare_dataset([])
+    assert len(X) == 0
+    assert len(y) == 0
+
+
+def test_prepare_dataset_memoizes_saved_schedules(tmp_path):
+    """Test saved schedules are extracted once and then served from the memo"""
+    calls = []
+    
+    class CountingExtractor(FeatureExtractor):
+        def _compute_rows(self, schedules):
+            calls.append(len(schedules))
+            return super()._compute_rows(schedules)
+    
+    schedules = [
+        {"schedule": make_schedule(f"S{i}", 10 + i), "saved_at": f"2025-01-15T08:0{i}:00"}
+        for i in range(3)
+    ]
+    schedules.append({"schedule": make_schedule("UNSAVED", 5)})
+    
+    extractor = CountingExtractor()
+    X1, y1 = extractor.prepare_dataset(schedules)
+    X2, y2 = extractor.prepare_dataset(schedules)
+    assert calls == [4, 1]
+    np.testing.assert_array_equal(X1, X2)
+    np.testing.assert_array_equal(y1, y2)
+    
+    # The memo is an LRU: with room for two rows the oldest one is re-extracted
+    calls.clear()
+    X3, _ = CountingExtractor(max_cached=2).prepare_dataset(schedules)
+    assert calls == [4]
+    extractor = CountingExtractor(max_cached=2)
+    extractor.prepare_dataset(schedules)
+    X4, _ = extractor.prepare_dataset(schedules)
+    assert calls == [4, 4, 2]
+    np.testing.assert_array_equal(X1, X3)
+    np.testing.assert_array_equal(X1, X4)
+
+
+def test_time_features_parse_offsets():
+    """Test generation time features for offset, naive and invalid timestamps"""
+    assert FeatureExtractor._time_features({"generated_at": "2025-01-15T08:30:00+05:30"}) == (8, 2)
+    assert FeatureExtractor._time_features({"generated_at": "2025-01-18T23:05:00"}) == (23, 5)
+    assert FeatureExtractor._time_features({"generated_at": "not a date"}) == (12, 0)
+    assert FeatureExtractor._time_features({"generated_at": None}) == (12, 0)
+    assert FeatureExtractor._time_features({}) == (12, 0)
+
+
+def test_extract_into_matches_extract_from_schedule():
+    """Test writing features by column index matches the feature dict"""
+    from ..feature_extractor import NUM_FEATURES, feature_matrix
+    
+    schedules = [make_schedule("S1", 12), make_schedule("S2", 0, generated_at=None)]
+    out = np.full((len(schedules), NUM_FEATURES), -1.0)
+    for i, schedule in enumerate(schedules):
+        FeatureExtractor.extract_into(schedule, out, i)
+    
+    expected = feature_matrix([FeatureExtractor.extract_from_schedule(s) for s in schedules])
+    np.testing.assert_allclose(out, expected)
+    
+    partial = feature_matrix([{"num_trains": 3.0}])
+    assert partial[0, CONFIG.FEATURES.index("num_trains")] == 3.0
+    assert partial.sum() == 3.0
+
+
+def test_features_from_soa_matches_dataset():
+    """Test the SoA feature kernel reproduces prepare_dataset's matrix"""
+    extractor = FeatureExtractor()
+    schedules = [make_schedule("S1", 25), make_schedule("S2", 0), make_schedule("S3", 7)]
+    
+    flat = extractor.flatten_schedules(schedules)
+    X_ref, _ = extractor.prepare_dataset(schedules)
+    np.testing.assert_allclose(FeatureExtractor.features_from_soa(flat), X_ref)
@@ -0,0 +1,117 @@
+"""
+Unit tests for feature aggregation kernels
+"""
+import numpy as np
+
+from ..feature_kernels import (
+    NUM_OUTPUTS, STATUS_CODES,
+    OUT_NUM_TRAINS, OUT_NUM_AVAILABLE, OUT_MAINTENANCE_COUNT,
+    OUT_AVG_READINESS, OUT_MIN_READINESS, OUT_TOTAL_MILEAGE,
+    OUT_MILEAGE_VARIANCE, OUT_CERTIFICATE_ISSUES, OUT_BRANDING_PRIORITY,
+    _aggregate_py, aggregate_schedule
+)
+
+
+def sample_arrays():
+    """Encoded fields for a four-train schedule"""
+    status = np.array([
+        STATUS_CODES["REVENUE_SERVICE"],
+        STATUS_CODES["STANDBY"],
+        STATUS_CODES["MAINTENANCE"],
+        STATUS_CODES["UNKNOWN"],
+    ], dtype=np.int8)
+    readiness = np.array([0.9, 0.7, 0.4, 0.8])
+    mileage = np.array([120000.0, 118500.0, 131250.0, 99000.0])
+    cert_expired = np.array([0, 1, 2, 0], dtype=np.int64)
+    priority = np.array([4, 0, 2, 1], dtype=np.int8)
+    return status, readiness, mileage, cert_expired, priority
+
+
+def test_aggregate_schedule_values():
+    """Test aggregate row against direct NumPy reductions"""
+    status, readiness, mileage, cert_expired, priority = sample_arrays()
+    row = aggregate_schedule(status, readiness, mileage, cert_expired, priority)
+    
+    assert row.shape == (NUM_OUTPUTS,)
+    assert row[OUT_NUM_TRAINS] == 4
+    assert row[OUT_NUM_AVAILABLE] == 2
+    assert row[OUT_MAINTENANCE_COUNT] == 1
+    assert np.isclose(row[OUT_AVG_READINESS], readiness.mean())
+    assert np.isclose(row[OUT_MIN_READINESS], 0.4)
+    assert np.isclose(row[OUT_TOTAL_MILEAGE], mileage.sum())
+    assert np.isclose(row[OUT_MILEAGE_VARIANCE], mileage.var())
+    assert row[OUT_CERTIFICATE_ISSUES] == 3
+    assert row[OUT_BRANDING_PRIORITY] == 7
+
+
+def test_aggregate_matches_fallback():
+    """Test compiled kernel and NumPy fallback agree"""
+    arrays = sample_arrays()
+    expected = np.empty(NUM_OUTPUTS)
+    _aggregate_py(*arrays, expected)
+    
+    np.testing.assert_allclose(aggregate_schedule(*arrays), expected)
+
+
+def test_aggregate_empty_schedule():
+    """Test schedule without trainsets aggregates to zeros"""
+    row = aggregate_schedule([], [], [], [], [])
+    assert np.all(row == 0.0)
+
+
+def test_single_pass_variance_large_mileage():
+    """Test single-pass variance stays accurate for large, close mileages"""
+    rng = np.random.default_rng(0)
+    mileage = 450000.0 + rng.uniform(0, 2500, size=200)
+    n = len(mileage)
+    arrays = (
+        np.full(n, STATUS_CODES["REVENUE_SERVICE"], dtype=np.int8),
+        np.full(n, 0.8),
+        mileage,
+        np.zeros(n, dtype=np.int64),
+        np.zeros(n, dtype=np.int8),
+    )
+    fallback = np.empty(NUM_OUTPUTS)
+    _aggregate_py(*arrays, fallback)
+    
+    assert np.isclose(aggregate_schedule(*arrays)[OUT_MILEAGE_VARIANCE], mileage.var(), rtol=1e-9)
+    assert np.isclose(fallback[OUT_MILEAGE_VARIANCE], mileage.var(), rtol=1e-9)
+
+
+def test_build_feature_matrix_matches_per_schedule():
+    """Test batched SoA aggregation matches aggregating each schedule"""
+    from ..feature_kernels import build_feature_matrix
+    
+    status, readiness, mileage, cert_expired, priority = sample_arrays()
+    offsets = np.array([0, 3, 3, 4])
+    columns = np.arange(NUM_OUTPUTS)[::-1].copy()
+    columns[0] = -1
+    
+    X = build_feature_matrix(status, readiness, mileage, cert_expired, priority, offsets, columns, NUM_OUTPUTS)
+    
+    for s in range(3):
+        segment = slice(offsets[s], offsets[s + 1])
+        row = aggregate_schedule(
+            status[segment], readiness[segment], mileage[segment],
+            cert_expired[segment], priority[segment]
+        )
+        np.testing.assert_allclose(X[s, columns[1:]], row[1:])
+        assert X[s, NUM_OUTPUTS - 1] == 0.0
+
+
+def test_build_feature_matrix_from_concurrent_threads():
+    """Test request threads can build feature matrices at the same time"""
+    from concurrent.futures import ThreadPoolExecutor
+    from ..feature_kernels import build_feature_matrix
+    
+    arrays = sample_arrays()
+    offsets = np.array([0, 1, 3, 4])
+    columns = np.arange(NUM_OUTPUTS)
+    
+    def build(_):
+        return build_feature_matrix(*arrays, offsets, columns, NUM_OUTPUTS)
+    
+    expected = build(None)
+    with ThreadPoolExecutor(max_workers=8) as ex:
+        for X in ex.map(build, range(64)):
+            np.testing.assert_array_equal(X, expected)
@@ -0,0 +1,111 @@
+"""
+Unit tests for hybrid ML/optimization scheduling
+"""
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from ..config import CONFIG
+from ..hybrid_scheduler import HybridScheduler
+from ..trainer import ModelTrainer
+
+
+class LinearModel:
+    """Model predicting a scaled num_trains column, counting predict calls"""
+    
+    def __init__(self, scale: float):
+        self.scale = scale
+        self.calls = 0
+    
+    def predict(self, X):
+        self.calls += 1
+        return np.asarray(X)[:, CONFIG.FEATURES.index("num_trains")] * self.scale
+
+
+def make_trainer(tmp_path):
+    trainer = ModelTrainer(model_dir=str(tmp_path / "models"))
+    trainer.models = {"a": LinearModel(2.0), "b": LinearModel(3.0)}
+    trainer.ensemble_weights = {"a": 0.5, "b": 0.5}
+    trainer.best_model_name = "b"
+    return trainer
+
+
+def test_predict_batch_matches_single_predictions(tmp_path):
+    """Test batch predict agrees with per-row predict"""
+    trainer = make_trainer(tmp_path)
+    rows = [{"num_trains": n} for n in (10, 20, 30)]
+    X = np.array([[r.get(f, 0.0) for f in CONFIG.FEATURES] for r in rows])
+    
+    for use_ensemble in (True, False):
+        predictions, confidences = trainer.predict_batch(X, use_ensemble=use_ensemble)
+        for i, row in enumerate(rows):
+            prediction, confidence = trainer.predict(row, use_ensemble=use_ensemble)
+            assert np.isclose(predictions[i], prediction)
+            assert np.isclose(confidences[i], confidence)
+
+
+def test_should_use_ml_batch_single_predict_per_model(tmp_path):
+    """Test batch decision issues one predict call per model"""
+    trainer = make_trainer(tmp_path)
+    scheduler = HybridScheduler(trainer)
+    
+    decisions = scheduler.should_use_ml_batch([{"num_trains": n} for n in (1, 10, 40)])
+    
+    assert [m.calls for m in trainer.models.values()] == [1, 1]
+    assert len(decisions) == 3
+    # Model disagreement grows with num_trains, lowering confidence
+    assert decisions[0][0] is True
+    assert decisions[2] == (False, 0.6)
+    assert scheduler.should_use_ml_batch([]) == []
+
+
+def test_should_use_ml_coalesces_concurrent_requests(tmp_path):
+    """Test concurrent single requests share batch predict calls"""
+    trainer = make_trainer(tmp_path)
+    scheduler = HybridScheduler(trainer)
+    scheduler._batcher.max_delay = 0.2
+    
+    results = {}
+    barrier = threading.Barrier(8)
+    
+    def request(n):
+        barrier.wait()
+        results[n] = scheduler.should_use_ml({"num_trains": n})
+    
+    threads = [threading.Thread(target=request, args=(n,)) for n in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(timeout=10)
+    
+    assert len(results) == 8
+    assert trainer.models["a"].calls < 8
+    for n, result in results.items():
+        assert result == scheduler.should_use_ml_batch([{"num_trains": n}])[0]
+
+
+def test_lone_request_skips_batch_window(tmp_path):
+    """Test a single request is scored without waiting out max_delay"""
+    trainer = make_trainer(tmp_path)
+    scheduler = HybridScheduler(trainer)
+    scheduler._batcher.max_delay = 5.0
+    
+    start = time.monotonic()
+    result = scheduler.should_use_ml({"num_trains": 5})
+    assert time.monotonic() - start < 1.0
+    assert result == scheduler.should_use_ml_batch([{"num_trains": 5}])[0]
+    
+    thread = scheduler._batcher._thread
+    scheduler.close()
+    assert not thread.is_alive()
+    with pytest.raises(RuntimeError):
+        scheduler.should_use_ml({"num_trains": 5})
+
+
+def test_should_use_ml_without_models(tmp_path):
+    """Test ML is not used when no model is loaded"""
+    trainer = ModelTrainer(model_dir=str(tmp_path / "models"))
+    scheduler = HybridScheduler(trainer)
+    assert scheduler.should_use_ml({"num_trains": 20}) == (False, 0.0)
@@ -0,0 +1,102 @@
+"""
+Unit tests for the background retraining service
+"""
+import json
+import threading
+import time
+
+import pytest
+
+from ..config import CONFIG
+from ..data_store import ScheduleDataStore
+from ..feature_cache import FeatureCache
+from ..retraining_service import RetrainingService, WATCHDOG_AVAILABLE
+from .test_feature_cache import CountingExtractor
+from .test_feature_extractor import make_schedule
+
+
+class StubTrainer:
+    """Trainer that only records should_retrain checks, with state under tmp_path"""
+    
+    def __init__(self, tmp_path):
+        self.feature_extractor = CountingExtractor()
+        self.data_store = ScheduleDataStore(
+            str(tmp_path / "schedules"), feature_extractor=self.feature_extractor
+        )
+        self.feature_cache = FeatureCache(
+            str(tmp_path / "features.npz"), self.data_store, self.feature_extractor
+        )
+        self.checks = 0
+        self.checked = threading.Event()
+    
+    def should_retrain(self):
+        self.checks += 1
+        self.checked.set()
+        return False
+    
+    def get_model_info(self):
+        return {}
+
+
+def make_service(tmp_path):
+    """Service around a stub trainer, with all state under tmp_path"""
+    trainer = StubTrainer(tmp_path)
+    service = RetrainingService(trainer)  # type: ignore
+    return trainer, service
+
+
+def test_stop_wakes_loop_immediately(tmp_path):
+    """Test stop() does not wait for the check interval"""
+    trainer, service = make_service(tmp_path)
+    service.start()
+    assert trainer.checked.wait(timeout=5)
+    
+    started = time.monotonic()
+    service.stop()
+    assert time.monotonic() - started < 2
+    assert not service.thread.is_alive()
+
+
+def test_new_schedules_wake_loop(tmp_path):
+    """Test enough new schedules trigger an early retrain check"""
+    trainer, service = make_service(tmp_path)
+    service.start()
+    try:
+        assert trainer.checked.wait(timeout=5)
+        trainer.checked.clear()
+        
+        for _ in range(CONFIG.MIN_SCHEDULES_FOR_RETRAIN):
+            service._on_new_schedule()
+        
+        assert trainer.checked.wait(timeout=5)
+        assert trainer.checks == 2
+    finally:
+        service.stop()
+
+
+def test_ingest_thread_keeps_feature_cache_current(tmp_path):
+    """Test new schedules are extracted ahead of retraining, not at retrain time"""
+    if not WATCHDOG_AVAILABLE:
+        pytest.skip("watchdog not installed")
+    
+    trainer, service = make_service(tmp_path)
+    assert service.feature_cache is trainer.feature_cache
+    extractor = trainer.feature_extractor
+    data_dir = trainer.data_store.data_dir
+    service.ingest_debounce_seconds = 0.1
+    service.start()
+    try:
+        trainer.data_store.save_schedule(make_schedule("S0", 5))
+        (data_dir / "LEGACY.json").write_text(json.dumps({"schedule": make_schedule("L", 6)}))
+        trainer.data_store.save_schedule(make_schedule("S1", 7))
+        
+        deadline = time.monotonic() + 10
+        while extractor.extracted < 3 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert extractor.extracted == 3
+    finally:
+        service.stop()
+    
+    X, y = trainer.feature_cache.load_dataset()
+    assert len(X) == len(y) == 3
+    assert extractor.extracted == 3
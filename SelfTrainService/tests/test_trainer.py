@@ -0,0 +1,245 @@
+"""
+Unit tests for model training
+"""
+import numpy as np
+
+from ..config import CONFIG
+from ..trainer import ModelTrainer
+
+
+def test_fit_models_in_config_order(tmp_path, monkeypatch):
+    """Test models are fitted and returned in MODEL_TYPES order, unknown types skipped"""
+    monkeypatch.setattr(CONFIG, "MODEL_TYPES", ["gradient_boosting", "unknown", "random_forest"])
+    monkeypatch.setattr(CONFIG, "TRAINING_WORKERS", 1)
+    monkeypatch.setattr(CONFIG, "EPOCHS", 10)
+    monkeypatch.setattr(CONFIG, "DATA_DIR", str(tmp_path / "schedules"))
+    
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(60, len(CONFIG.FEATURES)))
+    y = X[:, 0] * 10 + 50
+    trainer = ModelTrainer(model_dir=str(tmp_path))
+    
+    results = trainer._fit_models(X[:45], X[45:], y[:45], y[45:])
+    
+    assert [name for name, _, _ in results] == CONFIG.MODEL_TYPES
+    assert results[1][1] is None and results[1][2] is None
+    for _, model, metrics in (results[0], results[2]):
+        assert model is not None
+        assert set(metrics) == {"train_r2", "test_r2", "train_rmse", "test_rmse"}
+
+
+def test_predict_calls_each_model_once(tmp_path):
+    """Test single-row ensemble predict issues one predict call per model"""
+    from .test_hybrid_scheduler import make_trainer
+    
+    trainer = make_trainer(tmp_path)
+    prediction, confidence = trainer.predict({"num_trains": 10})
+    
+    assert np.isclose(prediction, 0.5 * 20 + 0.5 * 30)
+    assert np.isclose(confidence, 1.0 - np.std([20, 30]) / 50)
+    assert [model.calls for model in trainer.models.values()] == [1, 1]
+
+
+def test_predict_batch_accepts_feature_dicts(tmp_path):
+    """Test a list of feature dicts predicts like the equivalent matrix"""
+    from .test_hybrid_scheduler import make_trainer
+    
+    trainer = make_trainer(tmp_path)
+    rows = [{"num_trains": n} for n in (10, 20, 30)]
+    X = np.array([[r.get(f, 0.0) for f in CONFIG.FEATURES] for r in rows])
+    
+    from_dicts = trainer.predict_batch(rows)
+    from_matrix = trainer.predict_batch(X)
+    np.testing.assert_allclose(from_dicts, from_matrix)
+    assert [model.calls for model in trainer.models.values()] == [2, 2]
+    
+    predictions, confidences = trainer.predict_batch([])
+    assert predictions.shape == confidences.shape == (0,)
+
+
+def test_fast_predictors_match_wrappers(tmp_path, monkeypatch):
+    """Test booster-level predictors agree with the sklearn wrappers"""
+    monkeypatch.setattr(CONFIG, "MODEL_TYPES", ["xgboost", "lightgbm", "random_forest"])
+    monkeypatch.setattr(CONFIG, "TRAINING_WORKERS", 1)
+    monkeypatch.setattr(CONFIG, "EPOCHS", 10)
+    monkeypatch.setattr(CONFIG, "DATA_DIR", str(tmp_path / "schedules"))
+    
+    rng = np.random.default_rng(1)
+    X = rng.normal(size=(80, len(CONFIG.FEATURES)))
+    y = X[:, 1] * 5 + 40
+    trainer = ModelTrainer(model_dir=str(tmp_path / "models"))
+    trainer.models = {
+        name: model for name, model, _ in trainer._fit_models(X[:60], X[60:], y[:60], y[60:])
+    }
+    
+    for name, model in trainer.models.items():
+        np.testing.assert_allclose(trainer._predictor(name)(X[60:]), model.predict(X[60:]), rtol=1e-6)
+
+
+def test_save_and_load_native_formats(tmp_path, monkeypatch):
+    """Test models round-trip through native formats plus a manifest"""
+    monkeypatch.setattr(CONFIG, "MODEL_TYPES", ["xgboost", "lightgbm", "catboost", "random_forest"])
+    monkeypatch.chdir(tmp_path)  # CatBoost writes catboost_info/ to the cwd
+    monkeypatch.setattr(CONFIG, "TRAINING_WORKERS", 1)
+    monkeypatch.setattr(CONFIG, "EPOCHS", 10)
+    monkeypatch.setattr(CONFIG, "DATA_DIR", str(tmp_path / "schedules"))
+    
+    rng = np.random.default_rng(2)
+    X = rng.normal(size=(CONFIG.MIN_SCHEDULES_FOR_TRAINING + 20, len(CONFIG.FEATURES)))
+    y = X[:, 2] * 5 + 60
+    trainer = ModelTrainer(model_dir=str(tmp_path / "models"))
+    result = trainer.train(force=True, X=X, y=y)
+    assert result["success"]
+    history = (tmp_path / "models" / "training_history.jsonl").read_text().splitlines()
+    assert len(history) == 1
+    
+    files = sorted(p.name for p in (tmp_path / "models").glob("models_*/*"))
+    assert files == ["catboost.cbm", "lightgbm.txt", "manifest.json", "sklearn.pkl", "xgboost.ubj"]
+    
+    loaded = ModelTrainer(model_dir=str(tmp_path / "models"))
+    assert loaded.load_model()
+    assert loaded.best_model_name == trainer.best_model_name
+    assert loaded.last_trained == trainer.last_trained
+    np.testing.assert_allclose(loaded.predict_batch(X), trainer.predict_batch(X), rtol=1e-6)
+
+
+def test_should_retrain_caches_store_scan(tmp_path, monkeypatch):
+    """Test repeated should_retrain calls reuse the new-schedule scan until last_trained changes"""
+    from datetime import datetime, timedelta
+    
+    monkeypatch.setattr(CONFIG, "DATA_DIR", str(tmp_path / "schedules"))
+    trainer = ModelTrainer(model_dir=str(tmp_path / "models"))
+    trainer.last_trained = datetime.now() - timedelta(hours=CONFIG.RETRAIN_INTERVAL_HOURS + 1)
+    
+    calls = []
+    def get_schedules_since(since):
+        calls.append(since)
+        return [{}] * CONFIG.MIN_SCHEDULES_FOR_RETRAIN
+    monkeypatch.setattr(trainer.data_store, "get_schedules_since", get_schedules_since)
+    
+    assert trainer.should_retrain() and trainer.should_retrain()
+    assert len(calls) == 1
+    
+    trainer.last_trained -= timedelta(minutes=1)
+    assert trainer.should_retrain()
+    assert len(calls) == 2
+
+
+def test_ensemble_weights_softmax_handles_negative_scores(tmp_path, monkeypatch):
+    """Test ensemble weights are positive, normalized and ordered by R²"""
+    monkeypatch.setattr(CONFIG, "MODEL_TYPES", ["gradient_boosting", "random_forest"])
+    monkeypatch.setattr(CONFIG, "DATA_DIR", str(tmp_path / "schedules"))
+    trainer = ModelTrainer(model_dir=str(tmp_path / "models"))
+    
+    def fake_fit_models(*args):
+        return [
+            ("gradient_boosting", object(), {"test_r2": -0.4, "test_rmse": 1.0}),
+            ("random_forest", object(), {"test_r2": 0.3, "test_rmse": 1.0}),
+        ]
+    monkeypatch.setattr(trainer, "_fit_models", fake_fit_models)
+    monkeypatch.setattr(trainer, "save_model", lambda: None)
+    
+    n = CONFIG.MIN_SCHEDULES_FOR_TRAINING
+    trainer.train(force=True, X=np.zeros((n, len(CONFIG.FEATURES))), y=np.zeros(n))
+    
+    weights = trainer.ensemble_weights
+    assert np.isclose(sum(weights.values()), 1.0)
+    assert 0 < weights["gradient_boosting"] < weights["random_forest"]
+
+
+def test_train_reads_dataset_from_feature_cache(tmp_path, monkeypatch):
+    """Test train() without X uses the same FeatureCache dataset as retraining"""
+    import json
+    from .test_feature_extractor import make_schedule
+    monkeypatch.setattr(CONFIG, "DATA_DIR", str(tmp_path / "schedules"))
+    monkeypatch.setattr(CONFIG, "CHECKPOINT_DIR", str(tmp_path / "checkpoints"))
+    trainer = ModelTrainer(model_dir=str(tmp_path / "models"))
+    
+    n = CONFIG.MIN_SCHEDULES_FOR_TRAINING
+    for i in range(n):
+        trainer.data_store.save_schedule(make_schedule(f"S{i}", 5 + i % 20))
+    (trainer.data_store.data_dir / "LEGACY.json").write_text(
+        json.dumps({"schedule": make_schedule("LEGACY", 8)})
+    )
+    
+    fitted = []
+    def fake_fit_models(X_train, X_test, y_train, y_test):
+        fitted.append(len(X_train) + len(X_test))
+        return [("random_forest", object(), {"test_r2": 0.5, "test_rmse": 1.0})]
+    monkeypatch.setattr(trainer, "_fit_models", fake_fit_models)
+    monkeypatch.setattr(trainer, "save_model", lambda: None)
+    
+    assert trainer.train(force=True)["success"]
+    X, _ = trainer.feature_cache.load_dataset()
+    assert fitted == [len(X)] == [n + 1]
+
+
+def test_load_legacy_pickle(tmp_path, monkeypatch):
+    """Test a models_latest.pkl from older versions still loads"""
+    import pickle
+    from datetime import datetime
+    from .test_hybrid_scheduler import LinearModel
+    
+    monkeypatch.setattr(CONFIG, "DATA_DIR", str(tmp_path / "schedules"))
+    model_dir = tmp_path / "models"
+    model_dir.mkdir()
+    trained = datetime(2025, 1, 15, 8, 30)
+    with open(model_dir / "models_latest.pkl", "wb") as f:
+        pickle.dump({
+            "models": {"a": LinearModel(2.0)},
+            "ensemble_weights": {},
+            "best_model_name": "a",
+            "last_trained": trained,
+        }, f)
+    
+    trainer = ModelTrainer(model_dir=str(model_dir))
+    assert trainer.load_model()
+    assert trainer.best_model_name == "a"
+    assert trainer.last_trained == trained
+    assert np.isclose(trainer.predict({"num_trains": 5}, use_ensemble=False)[0], 10.0)
+
+
+def test_split_indices_cached_and_disjoint(tmp_path, monkeypatch):
+    """Test the train/test split partitions the rows and is reused for the same size"""
+    monkeypatch.setattr(CONFIG, "DATA_DIR", str(tmp_path / "schedules"))
+    trainer = ModelTrainer(model_dir=str(tmp_path / "models"))
+    
+    train_idx, test_idx = trainer._split_indices(101)
+    assert len(test_idx) == int(np.ceil(101 * CONFIG.TRAIN_TEST_SPLIT))
+    assert sorted(np.concatenate([train_idx, test_idx])) == list(range(101))
+    assert trainer._split_indices(101)[0] is train_idx
+    assert len(trainer._split_indices(50)[0]) + len(trainer._split_indices(50)[1]) == 50
+
+
+def test_warmup_predicts_with_every_model(tmp_path):
+    """Test warmup calls each model once, including ones outside the ensemble"""
+    from .test_hybrid_scheduler import make_trainer
+    
+    trainer = make_trainer(tmp_path)
+    trainer.ensemble_weights = {"a": 1.0}
+    
+    trainer.warmup()
+    
+    assert [model.calls for model in trainer.models.values()] == [1, 1]
+
+
+def test_retrain_keeps_serving_previous_models(tmp_path, monkeypatch):
+    """Test predictions use the old models until the retrained set is swapped in"""
+    from .test_hybrid_scheduler import LinearModel, make_trainer
+    
+    trainer = make_trainer(tmp_path)
+    before = trainer.predict({"num_trains": 10})
+    during = []
+    
+    def fake_fit_models(*args):
+        during.append(trainer.predict({"num_trains": 10}))
+        return [("c", LinearModel(4.0), {"test_r2": 0.5, "test_rmse": 1.0})]
+    monkeypatch.setattr(trainer, "_fit_models", fake_fit_models)
+    monkeypatch.setattr(trainer, "save_model", lambda: None)
+    
+    n = CONFIG.MIN_SCHEDULES_FOR_TRAINING
+    trainer.train(force=True, X=np.zeros((n, len(CONFIG.FEATURES))), y=np.zeros(n))
+    
+    assert during == [before]
+    assert list(trainer.models) == ["c"]
+    assert np.isclose(trainer.predict({"num_trains": 10})[0], 40.0)
@@ -2,24 +2,108 @@
 ML Model Trainer for Schedule Optimization
 Handles model training and retraining with multiple models and ensemble
 """
+import mmap
 import os
 import pickle
+import sys
 import json
+import threading
+import time
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Optional, Dict, Tuple
+from typing import Optional, Dict, List, Tuple, Union
 import numpy as np
+import orjson
+from joblib import Parallel, delayed
 
 from sklearn.ensemble import GradientBoostingRegressor, RandomForestRegressor
-from sklearn.model_selection import train_test_split
 from sklearn.metrics import mean_squared_error, r2_score
-import xgboost as xgb
-import catboost as cb
-import lightgbm as lgb
 
 from .config import CONFIG
 from .data_store import ScheduleDataStore
-from .feature_extractor import FeatureExtractor
+from .feature_cache import FeatureCache
+from .feature_extractor import FeatureExtractor, feature_matrix
+
+
+def _fit_one(
+    model_name: str,
+    X_train: np.ndarray,
+    y_train: np.ndarray,
+    X_test: np.ndarray,
+    y_test: np.ndarray,
+    threads: Optional[int] = None
+) -> Tuple[str, Optional[object], Optional[Dict]]:
+    """Fit and evaluate one model, returning (name, model, metrics)
+    
+    ``model`` and ``metrics`` are None if the model type is not available.
+    """
+    model = ModelTrainer._get_model(model_name, n_jobs=threads)
+    if model is None:
+        return model_name, None, None
+    
+    # Train model
+    model.fit(X_train, y_train)
+    
+    # Evaluate; train metrics are informational only, so large training
+    # sets are scored on a fixed 10% sample (at least 1000 rows)
+    sample_size = min(len(X_train), max(1000, len(X_train) // 10))
+    if sample_size < len(X_train):
+        idx = np.random.default_rng(42).choice(len(X_train), size=sample_size, replace=False)
+        X_train, y_train = X_train[idx], y_train[idx]
+    train_pred = model.predict(X_train)
+    test_pred = model.predict(X_test)
+    
+    metrics = {
+        "train_r2": r2_score(y_train, train_pred),  # type: ignore
+        "test_r2": r2_score(y_test, test_pred),  # type: ignore
+        "train_rmse": np.sqrt(mean_squared_error(y_train, train_pred)),  # type: ignore
+        "test_rmse": np.sqrt(mean_squared_error(y_test, test_pred))  # type: ignore
+    }
+    return model_name, model, metrics
+
+
+MODEL_MANIFEST = "manifest.json"
+LATEST_MANIFEST = "models_latest.json"
+
+
+def _load_pickle(path: Path):
+    """Unpickle a file through a read-only memory map (no read() copy)"""
+    with open(path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return pickle.loads(mm)
+
+
+# xgboost, lightgbm and catboost are imported on first use (they load large
+# native libraries); an instance of their classes implies the module is loaded
+def _model_library(model) -> Optional[str]:
+    """Which boosting library a model comes from, None for anything else"""
+    xgb = sys.modules.get("xgboost")
+    if xgb is not None and isinstance(model, xgb.XGBRegressor):
+        return "xgboost"
+    lgb = sys.modules.get("lightgbm")
+    if lgb is not None and isinstance(model, (lgb.LGBMRegressor, lgb.Booster)):
+        return "lightgbm"
+    cb = sys.modules.get("catboost")
+    if cb is not None and isinstance(model, cb.CatBoost):
+        return "catboost"
+    return None
+
+
+def _fast_predictor(model):
+    """Predict function bypassing the sklearn wrapper where the library allows
+    
+    XGBoost's ``inplace_predict`` scores a NumPy array without building a
+    DMatrix and LightGBM's booster skips the wrapper's input validation
+    (models loaded from disk already are boosters).
+    Other models (including CatBoost, whose wrapper already hands arrays to
+    its C++ core) use their own ``predict``.
+    """
+    library = _model_library(model)
+    if library == "xgboost":
+        return model.get_booster().inplace_predict
+    if library == "lightgbm" and hasattr(model, "booster_"):
+        return model.booster_.predict
+    return model.predict
 
 
 class ModelTrainer:
@@ -29,18 +113,41 @@ class ModelTrainer:
         self.model_dir = Path(model_dir or CONFIG.MODEL_DIR)
         self.model_dir.mkdir(parents=True, exist_ok=True)
         
-        self.data_store = ScheduleDataStore()
         self.feature_extractor = FeatureExtractor()
+        self.data_store = ScheduleDataStore(feature_extractor=self.feature_extractor)
+        self.feature_cache = FeatureCache(
+            data_store=self.data_store, feature_extractor=self.feature_extractor
+        )
         
         self.models = {}  # Dictionary of trained models
+        # Guards swapping in a new model set (models, weights, best model and
+        # training time) so predictions never see a half-updated one
+        self._models_lock = threading.Lock()
+        self._predictors = {}  # name -> (model, predict function)
+        # (monotonic check time, last_trained it was computed for, result)
+        self._retrain_cache: Optional[Tuple[float, datetime, bool]] = None
+        # ((num_samples, test_size, seed), (train_idx, test_idx)) of the last split
+        self._split_cache: Optional[Tuple[Tuple, Tuple[np.ndarray, np.ndarray]]] = None
+        
+        # Single-row predict fills a reusable per-thread buffer by index
+        self._features = tuple(CONFIG.FEATURES)  # type: ignore
+        self._nfeat = len(self._features)
+        self._scratch = threading.local()
         self.model_scores = {}  # Performance scores for each model
         self.ensemble_weights = {}  # Weights for ensemble
         self.best_model_name = None
         self.last_trained = None
         self.training_history = []
     
-    def _get_model(self, model_name: str):
-        """Get model instance by name"""
+    @staticmethod
+    def _get_model(model_name: str, n_jobs: Optional[int] = None):
+        """Get model instance by name
+        
+        ``n_jobs`` caps the model's own threads (when models are fitted in
+        parallel processes); None keeps each library's default.
+        """
+        threads = {} if n_jobs is None else {"n_jobs": n_jobs}
+        
         if model_name == "gradient_boosting":
             return GradientBoostingRegressor(
                 n_estimators=CONFIG.EPOCHS,
@@ -52,31 +159,40 @@ class ModelTrainer:
             return RandomForestRegressor(
                 n_estimators=CONFIG.EPOCHS,
                 random_state=42,
-                n_jobs=-1
+                n_jobs=-1 if n_jobs is None else n_jobs
             )
         
         elif model_name == "xgboost":
+            import xgboost as xgb
             return xgb.XGBRegressor(
                 n_estimators=CONFIG.EPOCHS,
                 learning_rate=CONFIG.LEARNING_RATE,
+                tree_method="hist",
+                max_bin=255,
                 random_state=42,
-                verbosity=0
+                verbosity=0,
+                **threads
             )
         
         elif model_name == "lightgbm":
+            import lightgbm as lgb
             return lgb.LGBMRegressor(
                 n_estimators=CONFIG.EPOCHS,
                 learning_rate=CONFIG.LEARNING_RATE,
+                max_bin=255,
                 random_state=42,
-                verbose=-1
+                verbose=-1,
+                **threads
             )
         
         elif model_name == "catboost":
+            import catboost as cb
             return cb.CatBoostRegressor(
                 iterations=CONFIG.EPOCHS,
                 learning_rate=CONFIG.LEARNING_RATE,
                 random_state=42,
-                verbose=False
+                verbose=False,
+                **({} if n_jobs is None else {"thread_count": n_jobs})
             )
         
         return None
@@ -93,15 +209,35 @@ class ModelTrainer:
         ).total_seconds() / 3600
         
         if hours_since_training >= CONFIG.RETRAIN_INTERVAL_HOURS:
-            # Check if enough new data
-            new_schedules = self.data_store.get_schedules_since(self.last_trained)
-            if len(new_schedules) >= CONFIG.MIN_SCHEDULES_FOR_RETRAIN:
-                return True
+            # Check if enough new data (the store scan is cached briefly so
+            # status polls do not rescan it)
+            return self._enough_new_data()
         
         return False
     
-    def train(self, force: bool = False) -> Dict:
-        """Train or retrain all models"""
+    def _enough_new_data(self) -> bool:
+        now = time.monotonic()
+        cached = self._retrain_cache
+        if (cached is not None and cached[1] == self.last_trained
+                and now - cached[0] < CONFIG.RETRAIN_CHECK_TTL_SECONDS):
+            return cached[2]
+        
+        new_schedules = self.data_store.get_schedules_since(self.last_trained)  # type: ignore
+        result = len(new_schedules) >= CONFIG.MIN_SCHEDULES_FOR_RETRAIN
+        self._retrain_cache = (now, self.last_trained, result)  # type: ignore
+        return result
+    
+    def train(
+        self,
+        force: bool = False,
+        X: Optional[np.ndarray] = None,
+        y: Optional[np.ndarray] = None
+    ) -> Dict:
+        """Train or retrain all models
+        
+        If ``X`` and ``y`` are given they are used directly; otherwise the
+        dataset is read from ``self.feature_cache``.
+        """
         
         if not force and not self.should_retrain():
             return {
@@ -109,81 +245,75 @@ class ModelTrainer:
                 "reason": "Retraining not needed yet"
             }
         
-        # Load data
-        schedules = self.data_store.load_schedules()
+        if X is None or y is None:
+            X, y = self.feature_cache.load_dataset()
+        num_samples = len(X)
         
-        if len(schedules) < CONFIG.MIN_SCHEDULES_FOR_TRAINING:
+        if num_samples < CONFIG.MIN_SCHEDULES_FOR_TRAINING:
             return {
                 "success": False,
-                "reason": f"Not enough data. Need {CONFIG.MIN_SCHEDULES_FOR_TRAINING}, have {len(schedules)}"
+                "reason": f"Not enough data. Need {CONFIG.MIN_SCHEDULES_FOR_TRAINING}, have {num_samples}"
             }
         
-        # Prepare dataset
-        X, y = self.feature_extractor.prepare_dataset(schedules)
-        
         if len(X) == 0:
             return {
                 "success": False,
                 "error": "No valid features extracted"
             }
         
-        # Split data
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=CONFIG.TRAIN_TEST_SPLIT, random_state=42
-        )
+        # Boosters bin features into histograms anyway; float32 halves the
+        # memory traffic of fitting and scoring
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        y = np.asarray(y, dtype=np.float32)
         
-        # Train all models
-        self.models = {}
-        self.model_scores = {}
+        # Split data
+        train_idx, test_idx = self._split_indices(len(X))
+        X_train, X_test = X[train_idx], X[test_idx]
+        y_train, y_test = y[train_idx], y[test_idx]
+        
+        # Train all models; the current ones keep serving predictions until
+        # the new set is swapped in below
+        models = {}
+        model_scores = {}
         all_metrics = {}
         
-        for model_name in CONFIG.MODEL_TYPES:
-            print(f"Training {model_name}...")
-            model = self._get_model(model_name)
-            
+        for model_name, model, metrics in self._fit_models(X_train, X_test, y_train, y_test):
             if model is None:
                 print(f"Skipping {model_name} - not available")
                 continue
             
-            # Train model
-            model.fit(X_train, y_train)
-            
-            # Evaluate
-            train_pred = model.predict(X_train)
-            test_pred = model.predict(X_test)
-
-            train_r2 = r2_score(y_train, train_pred) # type: ignore
-            test_r2 = r2_score(y_test, test_pred)   # type: ignore
-            test_rmse = np.sqrt(mean_squared_error(y_test, test_pred))  # type: ignore
-            
-            self.models[model_name] = model
-            self.model_scores[model_name] = test_r2
-            
-            all_metrics[model_name] = {
-                "train_r2": train_r2,
-                "test_r2": test_r2,
-                "train_rmse": np.sqrt(mean_squared_error(y_train, train_pred)), # type: ignore
-                "test_rmse": test_rmse
-            }
+            models[model_name] = model
+            model_scores[model_name] = metrics["test_r2"]
+            all_metrics[model_name] = metrics
             
-            print(f"  {model_name}: R² = {test_r2:.4f}, RMSE = {test_rmse:.4f}")
+            print(f"  {model_name}: R² = {metrics['test_r2']:.4f}, RMSE = {metrics['test_rmse']:.4f}")
         
         # Compute ensemble weights based on performance
-        if CONFIG.USE_ENSEMBLE and len(self.models) > 1:
-            total_score = sum(self.model_scores.values())
-            self.ensemble_weights = {
-                name: score / total_score 
-                for name, score in self.model_scores.items()
-            }
+        if CONFIG.USE_ENSEMBLE and len(models) > 1:
+            # Softmax of R² stays positive and normalized even when some
+            # holdout scores are negative (score / sum could flip sign or
+            # divide by zero)
+            names = list(model_scores)
+            scores = np.fromiter(model_scores.values(), dtype=np.float64, count=len(names))
+            weights = np.exp((scores - scores.max()) / CONFIG.ENSEMBLE_TEMPERATURE)
+            weights /= weights.sum()
+            ensemble_weights = dict(zip(names, weights.tolist()))
         else:
-            self.ensemble_weights = {}
+            ensemble_weights = {}
         
         # Find best model
-        if self.model_scores:
-            self.best_model_name = max(self.model_scores.items(), key=lambda x: x[1])[0]
+        best_model_name = self.best_model_name
+        if model_scores:
+            best_model_name = max(model_scores.items(), key=lambda x: x[1])[0]
+        
+        with self._models_lock:
+            self.models = models
+            self.model_scores = model_scores
+            self.ensemble_weights = ensemble_weights
+            self.best_model_name = best_model_name
+            self.last_trained = datetime.now()
         
         # Save model
-        self.last_trained = datetime.now()
         self.save_model()
         
         # Record training history
@@ -210,6 +340,42 @@ class ModelTrainer:
             "timestamp": self.last_trained.isoformat()
         }
     
+    def _split_indices(self, num_samples: int, seed: int = 42) -> Tuple[np.ndarray, np.ndarray]:
+        """Deterministic train/test indices, reused while the dataset size is unchanged"""
+        key = (num_samples, CONFIG.TRAIN_TEST_SPLIT, seed)
+        if self._split_cache is None or self._split_cache[0] != key:
+            perm = np.random.default_rng(seed).permutation(num_samples)
+            # Round the test share up, as train_test_split does
+            num_test = int(np.ceil(num_samples * CONFIG.TRAIN_TEST_SPLIT))
+            self._split_cache = (key, (perm[num_test:], perm[:num_test]))
+        return self._split_cache[1]
+    
+    def _fit_models(self, X_train, X_test, y_train, y_test) -> List[Tuple[str, Optional[object], Optional[Dict]]]:
+        """Fit every configured model type, in parallel processes when possible
+        
+        Each model type trains in its own process so the pure-Python parts of
+        fitting do not serialize on the GIL. Results come back in
+        ``CONFIG.MODEL_TYPES`` order.
+        """
+        model_types = list(CONFIG.MODEL_TYPES)
+        cpus = os.cpu_count() or 1
+        workers = CONFIG.TRAINING_WORKERS or min(len(model_types), cpus)
+        
+        for model_name in model_types:
+            print(f"Training {model_name}...")
+        
+        # Split the cores between workers so the libraries' own thread pools
+        # do not oversubscribe the machine
+        threads = max(1, cpus // workers) if workers > 1 else None
+        
+        # loky workers are reused across retrains and large arrays are
+        # memory-mapped to them rather than pickled per task; with a single
+        # worker joblib fits in-process
+        return Parallel(n_jobs=workers, backend="loky")(
+            delayed(_fit_one)(model_name, X_train, y_train, X_test, y_test, threads)
+            for model_name in model_types
+        )
+    
     def predict(self, features: Dict[str, float], use_ensemble: bool = True) -> Tuple[float, float]:
         """Predict schedule quality and confidence"""
         if not self.models:
@@ -218,51 +384,153 @@ class ModelTrainer:
         if not self.models:
             return 0.0, 0.0
         
-        # Convert features to vector
-        feature_vector = np.array([
-            [features.get(f, 0.0) for f in CONFIG.FEATURES]
-        ])
-        
-        if use_ensemble and CONFIG.USE_ENSEMBLE and self.ensemble_weights:
-            # Ensemble prediction
-            prediction = 0.0
-            for model_name, weight in self.ensemble_weights.items():
-                if model_name in self.models:
-                    pred = self.models[model_name].predict(feature_vector)[0]
-                    prediction += weight * pred
+        buf = getattr(self._scratch, "row", None)
+        if buf is None:
+            buf = self._scratch.row = np.zeros((1, self._nfeat), dtype=np.float32)
+        row = buf[0]
+        for i, f in enumerate(self._features):
+            row[i] = features.get(f, 0.0)
+        
+        prediction, confidence = self.predict_batch(buf, use_ensemble=use_ensemble)
+        return float(prediction[0]), float(confidence[0])
+    
+    def predict_from_soa(
+        self,
+        arrays: Dict[str, np.ndarray],
+        use_ensemble: bool = True
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Predict for schedules given as flattened per-train arrays
+        
+        See ``FeatureExtractor.features_from_soa`` for the expected keys.
+        """
+        return self.predict_batch(FeatureExtractor.features_from_soa(arrays), use_ensemble=use_ensemble)
+    
+    def predict_batch(
+        self,
+        X: Union[np.ndarray, List[Dict[str, float]]],
+        use_ensemble: bool = True
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Predict quality and confidence for a batch of schedules
+        
+        ``X`` is either a feature matrix with rows in CONFIG.FEATURES order
+        or a list of feature dicts. Each model is called once for the whole
+        batch; predictions are returned as float64.
+        """
+        if not self.models:
+            self.load_model()
+        
+        if isinstance(X, list):
+            X = feature_matrix(X)
+        # Models are fitted on float32 features
+        X = np.atleast_2d(np.asarray(X, dtype=np.float32))
+        
+        # One consistent model set for the whole batch, even if a retrain
+        # swaps in a new one meanwhile
+        with self._models_lock:
+            models = self.models
+            ensemble_weights = self.ensemble_weights
+            best_model_name = self.best_model_name
+        
+        if not models or len(X) == 0:
+            return np.zeros(len(X)), np.zeros(len(X))
+        
+        if use_ensemble and CONFIG.USE_ENSEMBLE and ensemble_weights:
+            names = list(models.keys())
+            # Fill a presized (models, batch) array; no per-model list to stack
+            predictions = np.empty((len(names), len(X)), dtype=np.float64)
+            for i, name in enumerate(names):
+                predictions[i] = self._predictor(name, models)(X)
+            weights = np.fromiter(
+                (ensemble_weights.get(name, 0.0) for name in names),
+                dtype=np.float64,
+                count=len(names)
+            )
             
-            # Confidence based on ensemble agreement
-            predictions = [
-                self.models[name].predict(feature_vector)[0]
-                for name in self.models.keys()
-            ]
-            std_dev = np.std(predictions)
-            confidence = max(0.5, min(1.0, 1.0 - (std_dev / 50)))  # Higher agreement = higher confidence
+            prediction = weights @ predictions
+            # Higher agreement = higher confidence
+            confidence = np.clip(1.0 - predictions.std(axis=0) / 50, 0.5, 1.0)
         else:
-            # Use best single model
-            best_model = self.models.get(self.best_model_name)
-            if best_model is None:
-                best_model = list(self.models.values())[0]
+            name = best_model_name
+            if name not in models:
+                name = next(iter(models))
             
-            prediction = best_model.predict(feature_vector)[0]
-            confidence = min(1.0, 0.8 + (prediction / 100) * 0.2)
+            prediction = np.asarray(self._predictor(name, models)(X), dtype=np.float64)
+            confidence = np.minimum(1.0, 0.8 + (prediction / 100) * 0.2)
         
-        return float(prediction), float(confidence)
+        return prediction, confidence
+    
+    def _predictor(self, name: str, models: Optional[Dict] = None):
+        """Cached fast predict function for a model, rebuilt if the model changed
+        
+        ``models`` is the model set to look ``name`` up in (default: the
+        current one).
+        """
+        model = (self.models if models is None else models)[name]
+        cached = self._predictors.get(name)
+        if cached is None or cached[0] is not model:
+            cached = (model, _fast_predictor(model))
+            self._predictors[name] = cached
+        return cached[1]
+    
+    def warmup(self, num_rows: int = 16):
+        """Run every hot path once on dummy data
+        
+        Loads (or compiles) the numba feature kernels and makes each model's
+        first predict, with its lazy allocations, happen off the request path.
+        """
+        schedules = [{"trainsets": [{"status": "STANDBY"}] * (i % 4)} for i in range(num_rows)]
+        FeatureExtractor.extract_from_schedule(schedules[-1])
+        X = FeatureExtractor.features_from_soa(self.feature_extractor.flatten_schedules(schedules))
+        
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        models = self.models
+        for name in models:
+            self._predictor(name, models)(X)
     
     def save_model(self):
-        """Save all models to disk"""
+        """Save all models to disk
+        
+        Boosters are written in their native formats (XGBoost UBJSON,
+        LightGBM text, CatBoost .cbm); only the sklearn estimators are
+        pickled. A snapshot directory gets the files plus a manifest, and
+        ``models_latest.json`` is a copy of the newest manifest.
+        """
         if not self.models:
             return
         
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        model_path = self.model_dir / f"models_{timestamp}.pkl"
-        latest_path = self.model_dir / "models_latest.pkl"
-        
-        model_data = {
-            "models": self.models,
+        snapshot_dir = self.model_dir / f"models_{timestamp}"
+        snapshot_dir.mkdir(parents=True, exist_ok=True)
+        
+        entries = {}
+        pickled = {}
+        for name, model in self.models.items():
+            library = _model_library(model)
+            if library == "xgboost":
+                fmt, filename = "xgboost", f"{name}.ubj"
+                model.save_model(snapshot_dir / filename)
+            elif library == "lightgbm":
+                fmt, filename = "lightgbm", f"{name}.txt"
+                booster = getattr(model, "booster_", model)
+                booster.save_model(str(snapshot_dir / filename))
+            elif library == "catboost":
+                fmt, filename = "catboost", f"{name}.cbm"
+                model.save_model(str(snapshot_dir / filename))
+            else:
+                fmt, filename = "pickle", "sklearn.pkl"
+                pickled[name] = model
+            # Paths are relative to model_dir so the latest copy resolves too
+            entries[name] = {"format": fmt, "file": f"{snapshot_dir.name}/{filename}"}
+        
+        if pickled:
+            with open(snapshot_dir / "sklearn.pkl", 'wb') as f:
+                pickle.dump(pickled, f, protocol=pickle.HIGHEST_PROTOCOL)
+        
+        manifest = {
+            "models": entries,
             "ensemble_weights": self.ensemble_weights,
             "best_model_name": self.best_model_name,
-            "last_trained": self.last_trained,
+            "last_trained": self.last_trained.isoformat() if self.last_trained else None,
             "config": {
                 "version": CONFIG.MODEL_VERSION,
                 "features": CONFIG.FEATURES,
@@ -270,37 +538,86 @@ class ModelTrainer:
             }
         }
         
-        with open(model_path, 'wb') as f:
-            pickle.dump(model_data, f)
+        with open(snapshot_dir / MODEL_MANIFEST, 'w') as f:
+            json.dump(manifest, f, indent=2, default=str)
         
-        with open(latest_path, 'wb') as f:
-            pickle.dump(model_data, f)
+        latest_path = self.model_dir / LATEST_MANIFEST
+        tmp_path = latest_path.with_suffix(".tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f, indent=2, default=str)
+        os.replace(tmp_path, latest_path)
     
     def load_model(self) -> bool:
-        """Load models from disk"""
-        latest_path = self.model_dir / "models_latest.pkl"
+        """Load models from disk (native-format manifest, else legacy pickle)"""
+        manifest_path = self.model_dir / LATEST_MANIFEST
+        legacy_path = self.model_dir / "models_latest.pkl"
         
-        if not latest_path.exists():
+        if not manifest_path.exists() and not legacy_path.exists():
             return False
         
         try:
-            with open(latest_path, 'rb') as f:
-                model_data = pickle.load(f)
+            if manifest_path.exists():
+                model_data = self._load_manifest(manifest_path)
+            else:
+                model_data = _load_pickle(legacy_path)
             
-            self.models = model_data["models"]
-            self.ensemble_weights = model_data.get("ensemble_weights", {})
-            self.best_model_name = model_data.get("best_model_name")
-            self.last_trained = model_data.get("last_trained")
+            with self._models_lock:
+                self.models = model_data["models"]
+                self.ensemble_weights = model_data.get("ensemble_weights", {})
+                self.best_model_name = model_data.get("best_model_name")
+                self.last_trained = model_data.get("last_trained")
             return True
         except Exception as e:
             print(f"Error loading models: {e}")
             return False
     
+    def _load_manifest(self, manifest_path: Path) -> Dict:
+        """Load every model listed in a manifest with its library's native loader"""
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        
+        models = {}
+        pickles: Dict[Path, Dict] = {}
+        for name, entry in manifest["models"].items():
+            path = self.model_dir / entry["file"]
+            fmt = entry["format"]
+            if fmt == "xgboost":
+                import xgboost as xgb
+                model = xgb.XGBRegressor()
+                model.load_model(path)
+            elif fmt == "lightgbm":
+                import lightgbm as lgb
+                model = lgb.Booster(model_file=str(path))
+            elif fmt == "catboost":
+                import catboost as cb
+                model = cb.CatBoostRegressor()
+                model.load_model(str(path))
+            else:
+                if path not in pickles:
+                    pickles[path] = _load_pickle(path)
+                model = pickles[path][name]
+            models[name] = model
+        
+        last_trained = manifest.get("last_trained")
+        return {
+            "models": models,
+            "ensemble_weights": manifest.get("ensemble_weights", {}),
+            "best_model_name": manifest.get("best_model_name"),
+            "last_trained": datetime.fromisoformat(last_trained) if last_trained else None,
+        }
+    
     def _save_history(self):
-        """Save training history"""
-        history_path = self.model_dir / "training_history.json"
-        with open(history_path, 'w') as f:
-            json.dump(self.training_history, f, indent=2, default=str)
+        """Append the latest training run to the JSON Lines history"""
+        if not self.training_history:
+            return
+        history_path = self.model_dir / "training_history.jsonl"
+        line = orjson.dumps(
+            self.training_history[-1],
+            option=orjson.OPT_SERIALIZE_NUMPY,
+            default=str
+        ) + b"\n"
+        with open(history_path, 'ab') as f:
+            f.write(line)
     
     def get_model_info(self) -> Dict:
         """Get information about current models"""
@@ -317,3 +634,19 @@ class ModelTrainer:
             "schedules_available": self.data_store.count_schedules(),
             "training_runs": len(self.training_history)
         }
+
+
+# Process-wide trainer shared by the scheduler, retraining service and API
+_shared_trainer: Optional[ModelTrainer] = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_trainer() -> ModelTrainer:
+    """Get or create the process-wide trainer, loading saved models once"""
+    global _shared_trainer
+    with _shared_lock:
+        if _shared_trainer is None:
+            trainer = ModelTrainer()
+            trainer.load_model()
+            _shared_trainer = trainer
+        return _shared_trainer
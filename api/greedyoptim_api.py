@@ -7,6 +7,7 @@ from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
 from typing import Dict, List, Any, Optional
+from contextlib import asynccontextmanager
 from datetime import datetime
 import logging
 import sys
@@ -24,12 +25,41 @@ from DataService.generators import EnhancedMetroDataGenerator
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Load the ML trainer once per worker process and share it across requests
+    
+    Every worker holds its own copy of the models, which is why the server
+    runs a single worker unless ``UVICORN_WORKERS`` says otherwise.
+    
+    The ML stack (sklearn, joblib, numba) is imported here rather than at
+    module level. Failing to load it only disables ML scoring; the API still
+    starts.
+    """
+    app.state.trainer = None
+    try:
+        from SelfTrainService.trainer import get_shared_trainer
+    except ImportError as e:
+        logger.warning(f"Self-training service unavailable: {e}")
+    else:
+        try:
+            trainer = get_shared_trainer()
+            # Compile kernels and touch every model before the first request
+            trainer.warmup()
+            app.state.trainer = trainer
+        except Exception as e:
+            logger.error(f"Failed to load ML trainer: {e}", exc_info=True)
+    yield
+
+
 app = FastAPI(
     title="GreedyOptim Scheduling API",
     description="Advanced train scheduling optimization using genetic algorithms, PSO, CMA-ES, and more",
     version="2.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
 app.add_middleware(
@@ -461,7 +491,8 @@ async def health_check():
     return {
         "status": "healthy",
         "timestamp": datetime.now().isoformat(),
-        "service": "greedyoptim-api"
+        "service": "greedyoptim-api",
+        "ml_models_loaded": bool(getattr(app.state, "trainer", None) and app.state.trainer.models)
     }
 
 
@@ -1026,4 +1057,16 @@ async def validate_data(request: ScheduleOptimizationRequest):
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run("api.greedyoptim_api:app", host="0.0.0.0", port=7860, reload=True)
+    # Each worker loads its own copy of the models, so one worker is the
+    # default. The file watcher is for development only and cannot run
+    # multiple workers.
+    reload = os.getenv("DEV_RELOAD") == "1"
+    workers = 1 if reload else int(os.getenv("UVICORN_WORKERS", "1"))
+    uvicorn.run(
+        "api.greedyoptim_api:app",
+        host="0.0.0.0",
+        port=7860,
+        workers=workers,
+        reload=reload,
+        log_level="info"
+    )
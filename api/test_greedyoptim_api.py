@@ -3,12 +3,29 @@
 Test script for GreedyOptim API
 Tests all endpoints with sample data
 """
+import orjson
 import requests
-import json
 from datetime import datetime, timedelta
+from requests.adapters import HTTPAdapter
 
 BASE_URL = "http://localhost:7860"
 
+# One keep-alive session for the whole suite instead of a new connection per request
+SESSION = requests.Session()
+SESSION.mount("http://", HTTPAdapter(pool_connections=8, pool_maxsize=8))
+
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+
+def post_json(url, payload):
+    """POST a payload serialized with orjson"""
+    return SESSION.post(url, data=orjson.dumps(payload), headers=JSON_HEADERS)
+
+
+def parse_json(response):
+    """Parse a response body with orjson"""
+    return orjson.loads(response.content)
+
 
 def test_health():
     """Test health check endpoint"""
@@ -16,9 +33,9 @@ def test_health():
     print("Testing Health Check")
     print("="*70)
     
-    response = requests.get(f"{BASE_URL}/health")
+    response = SESSION.get(f"{BASE_URL}/health")
     print(f"Status: {response.status_code}")
-    print(f"Response: {json.dumps(response.json(), indent=2)}")
+    print(f"Response: {orjson.dumps(parse_json(response), option=orjson.OPT_INDENT_2).decode()}")
     return response.status_code == 200
 
 
@@ -28,11 +45,11 @@ def test_methods():
     print("Testing Methods Listing")
     print("="*70)
     
-    response = requests.get(f"{BASE_URL}/methods")
+    response = SESSION.get(f"{BASE_URL}/methods")
     print(f"Status: {response.status_code}")
     
     if response.status_code == 200:
-        methods = response.json()
+        methods = parse_json(response)
         print(f"\nAvailable Methods: {len(methods['available_methods'])}")
         for method, info in methods['available_methods'].items():
             print(f"  {method}: {info['name']}")
@@ -52,11 +69,11 @@ def test_generate_synthetic():
         "availability_rate": 0.8
     }
     
-    response = requests.post(f"{BASE_URL}/generate-synthetic", json=payload)
+    response = post_json(f"{BASE_URL}/generate-synthetic", payload)
     print(f"Status: {response.status_code}")
     
     if response.status_code == 200:
-        result = response.json()
+        result = parse_json(response)
         print(f"\nGenerated Data:")
         print(f"  Trainsets: {result['metadata']['num_trainsets']}")
         print(f"  Fitness Certificates: {result['metadata']['num_fitness_certificates']}")
@@ -82,11 +99,11 @@ def test_validate(data):
         "method": "ga"
     }
     
-    response = requests.post(f"{BASE_URL}/validate", json=request_data)
+    response = post_json(f"{BASE_URL}/validate", request_data)
     print(f"Status: {response.status_code}")
     
     if response.status_code == 200:
-        result = response.json()
+        result = parse_json(response)
         print(f"\nValidation Result:")
         print(f"  Valid: {result['valid']}")
         if result['valid']:
@@ -124,11 +141,11 @@ def test_optimize(data):
     print(f"Optimizing with method: {request_data['method']}")
     print(f"Trainsets: {len(request_data['trainset_status'])}")
     
-    response = requests.post(f"{BASE_URL}/optimize", json=request_data)
+    response = post_json(f"{BASE_URL}/optimize", request_data)
     print(f"Status: {response.status_code}")
     
     if response.status_code == 200:
-        result = response.json()
+        result = parse_json(response)
         print(f"\nOptimization Results:")
         print(f"  Method: {result['method']}")
         print(f"  Fitness Score: {result['fitness_score']:.4f}")
@@ -179,11 +196,11 @@ def test_compare(data):
     print(f"Comparing methods: {request_data['methods']}")
     print(f"Trainsets: {len(request_data['trainset_status'])}")
     
-    response = requests.post(f"{BASE_URL}/compare", json=request_data)
+    response = post_json(f"{BASE_URL}/compare", request_data)
     print(f"Status: {response.status_code}")
     
     if response.status_code == 200:
-        result = response.json()
+        result = parse_json(response)
         print(f"\nComparison Results:")
         print(f"  Total Execution Time: {result['summary']['total_execution_time']:.3f}s")
         print(f"  Best Method: {result['summary']['best_method']}")
@@ -249,11 +266,11 @@ def test_custom_data():
     
     print(f"Testing with {len(custom_data['trainset_status'])} trainsets")
     
-    response = requests.post(f"{BASE_URL}/optimize", json=custom_data)
+    response = post_json(f"{BASE_URL}/optimize", custom_data)
     print(f"Status: {response.status_code}")
     
     if response.status_code == 200:
-        result = response.json()
+        result = parse_json(response)
         print(f"\nOptimization successful!")
         print(f"  Fitness: {result['fitness_score']:.4f}")
         print(f"  In Service: {result['num_service']}")
@@ -288,11 +305,11 @@ def test_schedule(data):
     print(f"Generating schedule with method: {request_data['method']}")
     print(f"Trainsets: {len(request_data['trainset_status'])}")
     
-    response = requests.post(f"{BASE_URL}/schedule", json=request_data)
+    response = post_json(f"{BASE_URL}/schedule", request_data)
     print(f"Status: {response.status_code}")
     
     if response.status_code == 200:
-        result = response.json()
+        result = parse_json(response)
         print(f"\nSchedule Generated:")
         print(f"  Schedule ID: {result['schedule_id']}")
         print(f"  Valid From: {result['valid_from']}")
@@ -348,14 +365,20 @@ def test_schedule_methods(data):
     methods = ['ga', 'pso', 'sa', 'nsga2']
     results = {}
     
+    # Subset is the same for every method: build it once, filtering by set lookup
+    trainset_status = data['trainset_status'][:15]
+    selected_ids = {ts['trainset_id'] for ts in trainset_status}
+    fitness_certificates = [fc for fc in data['fitness_certificates']
+                            if fc['trainset_id'] in selected_ids]
+    component_health = [ch for ch in data['component_health']
+                        if ch['trainset_id'] in selected_ids]
+    
     for method in methods:
         request_data = {
-            "trainset_status": data['trainset_status'][:15],
-            "fitness_certificates": [fc for fc in data['fitness_certificates'] 
-                                    if fc['trainset_id'] in [ts['trainset_id'] for ts in data['trainset_status'][:15]]],
+            "trainset_status": trainset_status,
+            "fitness_certificates": fitness_certificates,
             "job_cards": [],
-            "component_health": [ch for ch in data['component_health'] 
-                                if ch['trainset_id'] in [ts['trainset_id'] for ts in data['trainset_status'][:15]]],
+            "component_health": component_health,
             "method": method,
             "config": {
                 "required_service_trains": 6,
@@ -365,10 +388,10 @@ def test_schedule_methods(data):
             }
         }
         
-        response = requests.post(f"{BASE_URL}/schedule", json=request_data)
+        response = post_json(f"{BASE_URL}/schedule", request_data)
         
         if response.status_code == 200:
-            result = response.json()
+            result = parse_json(response)
             total_blocks = sum(
                 len(ts.get('service_blocks', [])) 
                 for ts in result['trainsets'] 
@@ -2,11 +2,12 @@
 Constraint Satisfaction Benchmarking Module
 Benchmarks for maintenance compliance, turnaround times, and energy constraints.
 """
-from .constraint_analyzer import ConstraintAnalyzer, ConstraintMetrics
+from .constraint_analyzer import ConstraintAnalyzer, ConstraintContext, ConstraintMetrics
 from .benchmark_constraints import run_constraint_benchmark
 
 __all__ = [
     'ConstraintAnalyzer',
+    'ConstraintContext',
     'ConstraintMetrics',
     'run_constraint_benchmark'
 ]
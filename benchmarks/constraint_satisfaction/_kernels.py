@@ -0,0 +1,226 @@
+"""
+Compiled Kernels for Constraint Analysis
+Reductions over flattened per-block and per-train arrays.
+"""
+from typing import Tuple
+
+import numpy as np
+
+try:
+    from numba import njit, types
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+try:
+    import numexpr
+    NUMEXPR_AVAILABLE = True
+except ImportError:
+    NUMEXPR_AVAILABLE = False
+
+# Below this many blocks numexpr's per-call setup outweighs fusing the NumPy ops
+NUMEXPR_MIN_BLOCKS = 10_000
+
+
+def _turnaround_py(train_index, departures, trip_counts, route_length_km, avg_speed_kmh, min_turnaround):
+    """NumPy implementation of the turnaround reduction (no numba)"""
+    # Estimated end time of each block, compared with the next block's start
+    durations_hours = (trip_counts * route_length_km * 2) / avg_speed_kmh
+    prev_end_minutes = departures[:-1] + durations_hours[:-1] * 60
+    turnarounds = departures[1:] - prev_end_minutes
+
+    # Only count positive turnarounds between blocks of the same train;
+    # unparseable times are NaN and drop out here
+    same_train = train_index[1:] == train_index[:-1]
+    turnarounds = turnarounds[same_train & (turnarounds > 0)]
+    if not turnarounds.size:
+        return 0, 0, 0.0, 0.0
+
+    compliant = int(np.count_nonzero(turnarounds >= min_turnaround))
+    return len(turnarounds), compliant, float(turnarounds.sum()), float(turnarounds.min())
+
+
+def _energy_py(block_km, trip_counts, energy_per_km, route_length_km, avg_speed_kmh, max_range_km):
+    """NumPy implementation of the energy reduction (no numba)"""
+    if NUMEXPR_AVAILABLE and block_km.size >= NUMEXPR_MIN_BLOCKS:
+        return _energy_numexpr(block_km, trip_counts, energy_per_km, route_length_km, avg_speed_kmh, max_range_km)
+
+    block_energy = block_km * energy_per_km
+
+    # Peak power (during acceleration) is ~1.5x the block's average power
+    block_duration_hours = trip_counts * (route_length_km * 2) / avg_speed_kmh
+    has_duration = block_duration_hours > 0
+    avg_power = block_energy[has_duration] / block_duration_hours[has_duration]
+    peak_power = max(0.0, float((avg_power * 1.5).max())) if avg_power.size else 0.0
+
+    range_violations = int(np.count_nonzero(block_km > max_range_km))
+    return float(block_energy.sum()), float(block_km.sum()), peak_power, range_violations
+
+
+def _energy_numexpr(block_km, trip_counts, energy_per_km, route_length_km, avg_speed_kmh, max_range_km):
+    """Energy reduction as fused numexpr expressions, without NumPy temporaries"""
+    local_dict = {
+        'km': block_km, 'trips': trip_counts,
+        'E': energy_per_km, 'L2': route_length_km * 2, 'S': avg_speed_kmh, 'R': max_range_km,
+    }
+    total_energy = numexpr.evaluate('sum(km * E)', local_dict=local_dict)
+    total_km = numexpr.evaluate('sum(km)', local_dict=local_dict)
+    peak_power = numexpr.evaluate(
+        'where(trips * L2 / S > 0, km * E / (trips * L2 / S) * 1.5, 0)', local_dict=local_dict
+    ).max()
+    range_violations = numexpr.evaluate('sum(where(km > R, 1, 0))', local_dict=local_dict)
+    return float(total_energy), float(total_km), max(0.0, float(peak_power)), int(range_violations)
+
+
+def _maintenance_py(mileage, in_maintenance, in_service, interval_km, overdue_km, overdue_unscheduled):
+    """NumPy implementation of the maintenance counts (no numba)"""
+    # Maintenance is needed within 90% of the interval
+    km_since_service = np.mod(mileage, interval_km)
+    needs_maintenance = km_since_service > (interval_km * 0.9)
+    is_overdue = needs_maintenance & (mileage > 0) & (km_since_service > overdue_km)
+    overdue_unscheduled[:] = is_overdue & ~in_maintenance
+
+    return (
+        int(np.count_nonzero(needs_maintenance)),
+        int(np.count_nonzero(needs_maintenance & in_maintenance)),
+        int(np.count_nonzero(overdue_unscheduled)),
+        int(np.count_nonzero(is_overdue & in_service)),
+    )
+
+
+if NUMBA_AVAILABLE:
+    @njit(
+        types.Tuple((types.int64, types.int64, types.float64, types.float64))(
+            types.int64[:], types.float64[:], types.float64[:],
+            types.float64, types.float64, types.float64,
+        ),
+        cache=True,
+    )
+    def _turnaround(train_index, departures, trip_counts, route_length_km, avg_speed_kmh, min_turnaround):
+        """Count, compliant count, sum and minimum of positive turnarounds"""
+        total = 0
+        compliant = 0
+        time_sum = 0.0
+        time_min = np.inf
+        for i in range(1, departures.shape[0]):
+            if train_index[i] != train_index[i - 1]:
+                continue
+            duration_hours = (trip_counts[i - 1] * route_length_km * 2) / avg_speed_kmh
+            turnaround = departures[i] - (departures[i - 1] + duration_hours * 60)
+            # NaN (unparseable) turnarounds fail this test
+            if turnaround > 0:
+                total += 1
+                time_sum += turnaround
+                if turnaround < time_min:
+                    time_min = turnaround
+                if turnaround >= min_turnaround:
+                    compliant += 1
+        if total == 0:
+            time_min = 0.0
+        return total, compliant, time_sum, time_min
+
+    @njit(
+        types.Tuple((types.float64, types.float64, types.float64, types.int64))(
+            types.float64[:], types.float64[:],
+            types.float64, types.float64, types.float64, types.float64,
+        ),
+        cache=True,
+    )
+    def _energy(block_km, trip_counts, energy_per_km, route_length_km, avg_speed_kmh, max_range_km):
+        """Total energy, total km, peak power and range violations over all blocks"""
+        total_energy = 0.0
+        total_km = 0.0
+        peak_power = 0.0
+        range_violations = 0
+        for i in range(block_km.shape[0]):
+            block_energy = block_km[i] * energy_per_km
+            total_energy += block_energy
+            total_km += block_km[i]
+
+            block_duration_hours = trip_counts[i] * (route_length_km * 2) / avg_speed_kmh
+            if block_duration_hours > 0:
+                peak_power = max(peak_power, block_energy / block_duration_hours * 1.5)
+
+            if block_km[i] > max_range_km:
+                range_violations += 1
+        return total_energy, total_km, peak_power, range_violations
+
+    @njit(
+        types.UniTuple(types.int64, 4)(
+            types.float64[:], types.boolean[:], types.boolean[:],
+            types.float64, types.float64, types.boolean[:],
+        ),
+        cache=True,
+    )
+    def _maintenance(mileage, in_maintenance, in_service, interval_km, overdue_km, overdue_unscheduled):
+        """Needing, scheduled, overdue-unscheduled and in-service-overdue counts"""
+        needing = 0
+        scheduled = 0
+        overdue = 0
+        violations = 0
+        for i in range(mileage.shape[0]):
+            overdue_unscheduled[i] = False
+            km_since_service = mileage[i] % interval_km
+            if not km_since_service > interval_km * 0.9:
+                continue
+
+            needing += 1
+            is_overdue = mileage[i] > 0 and km_since_service > overdue_km
+            if in_maintenance[i]:
+                scheduled += 1
+            elif is_overdue:
+                overdue += 1
+                overdue_unscheduled[i] = True
+            if in_service[i] and is_overdue:
+                violations += 1
+        return needing, scheduled, overdue, violations
+else:
+    _turnaround = _turnaround_py
+    _energy = _energy_py
+    _maintenance = _maintenance_py
+
+
+def turnaround_stats(
+    train_index, departures, trip_counts, route_length_km: float, avg_speed_kmh: float, min_turnaround: float
+) -> Tuple[int, int, float, float]:
+    """Reduce blocks sorted by (train, departure) to turnaround statistics
+
+    Returns (total, compliant, sum, min) over positive turnarounds between
+    consecutive blocks of the same train.
+    """
+    return _turnaround(
+        np.ascontiguousarray(train_index, dtype=np.int64),
+        np.ascontiguousarray(departures, dtype=np.float64),
+        np.ascontiguousarray(trip_counts, dtype=np.float64),
+        float(route_length_km), float(avg_speed_kmh), float(min_turnaround),
+    )
+
+
+def energy_stats(
+    block_km, trip_counts, energy_per_km: float, route_length_km: float, avg_speed_kmh: float, max_range_km: float
+) -> Tuple[float, float, float, int]:
+    """Reduce service blocks to (total energy, total km, peak power, range violations)"""
+    return _energy(
+        np.ascontiguousarray(block_km, dtype=np.float64),
+        np.ascontiguousarray(trip_counts, dtype=np.float64),
+        float(energy_per_km), float(route_length_km), float(avg_speed_kmh), float(max_range_km),
+    )
+
+
+def maintenance_stats(
+    mileage, in_maintenance, in_service, interval_km: float, overdue_km: float
+) -> Tuple[Tuple[int, int, int, int], np.ndarray]:
+    """Maintenance counts per schedule and the mask of overdue, unscheduled trains
+
+    Returns ((needing, scheduled, overdue, violations), overdue_unscheduled).
+    ``overdue_km`` is the overdue threshold within an interval.
+    """
+    mileage = np.ascontiguousarray(mileage, dtype=np.float64)
+    overdue_unscheduled = np.zeros(len(mileage), dtype=np.bool_)
+    counts = _maintenance(
+        mileage,
+        np.ascontiguousarray(in_maintenance, dtype=np.bool_),
+        np.ascontiguousarray(in_service, dtype=np.bool_),
+        float(interval_km), float(overdue_km), overdue_unscheduled,
+    )
+    return counts, overdue_unscheduled
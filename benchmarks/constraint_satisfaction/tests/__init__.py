@@ -0,0 +1 @@
+"""Tests for constraint satisfaction analysis"""
@@ -0,0 +1,331 @@
+"""
+Unit tests for constraint satisfaction analysis
+"""
+import dataclasses
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from benchmarks.constraint_satisfaction import _kernels
+from benchmarks.constraint_satisfaction._kernels import (
+    _energy, _energy_py, _maintenance, _maintenance_py, _turnaround, _turnaround_py,
+    energy_stats, maintenance_stats, turnaround_stats
+)
+from benchmarks.constraint_satisfaction.constraint_analyzer import ConstraintAnalyzer
+
+ROUTE_LENGTH_KM = ConstraintAnalyzer.ROUTE_LENGTH_KM
+AVG_SPEED_KMH = ConstraintAnalyzer.AVG_SPEED_KMH
+
+
+def _turnaround_reference(train_index, departures, trip_counts, min_turnaround):
+    """Per-pair loop over consecutive blocks of the same train"""
+    times = []
+    for i in range(1, len(departures)):
+        if train_index[i] != train_index[i - 1]:
+            continue
+        duration_hours = (trip_counts[i - 1] * ROUTE_LENGTH_KM * 2) / AVG_SPEED_KMH
+        turnaround = departures[i] - (departures[i - 1] + duration_hours * 60)
+        if turnaround > 0:
+            times.append(turnaround)
+    if not times:
+        return 0, 0, 0.0, 0.0
+    return len(times), sum(t >= min_turnaround for t in times), sum(times), min(times)
+
+
+def _energy_reference(block_km, trip_counts, energy_per_km, max_range_km):
+    """Per-block loop for total energy, total km, peak power and range violations"""
+    total_energy = total_km = peak_power = 0.0
+    range_violations = 0
+    for km, trips in zip(block_km, trip_counts):
+        total_energy += km * energy_per_km
+        total_km += km
+        duration_hours = trips * (ROUTE_LENGTH_KM * 2) / AVG_SPEED_KMH
+        if duration_hours > 0:
+            peak_power = max(peak_power, km * energy_per_km / duration_hours * 1.5)
+        range_violations += km > max_range_km
+    return total_energy, total_km, peak_power, range_violations
+
+
+def _maintenance_reference(mileage, in_maintenance, in_service, interval_km, overdue_km):
+    """Per-train loop for the maintenance counts and overdue, unscheduled mask"""
+    needing = scheduled = overdue = violations = 0
+    overdue_unscheduled = []
+    for km, maintained, serving in zip(mileage, in_maintenance, in_service):
+        since_service = km % interval_km
+        needs = since_service > interval_km * 0.9
+        is_overdue = needs and km > 0 and since_service > overdue_km
+        needing += needs
+        scheduled += needs and maintained
+        overdue += is_overdue and not maintained
+        violations += is_overdue and serving
+        overdue_unscheduled.append(is_overdue and not maintained)
+    return (needing, scheduled, overdue, violations), np.array(overdue_unscheduled, dtype=bool)
+
+
+def _random_blocks(rng, num_blocks):
+    """Blocks sorted by train with NaN departures, zero trip counts and train changes"""
+    train_index = np.sort(rng.integers(0, max(1, num_blocks // 4), num_blocks))
+    departures = rng.uniform(300, 1400, num_blocks)
+    departures[rng.random(num_blocks) < 0.05] = np.nan
+    order = np.lexsort((departures, train_index))
+    trip_counts = rng.integers(0, 4, num_blocks).astype(np.float64)
+    block_km = rng.uniform(0, 120, num_blocks)
+    return train_index[order], departures[order], trip_counts, block_km
+
+
+@pytest.mark.parametrize("seed, num_blocks", [(0, 0), (1, 1), (2, 2), (3, 50), (4, 500)])
+def test_turnaround_kernels_match_scalar_reference(seed, num_blocks):
+    """Test the compiled and NumPy turnaround reductions against a per-pair loop"""
+    train_index, departures, trip_counts, _ = _random_blocks(np.random.default_rng(seed), num_blocks)
+    expected = _turnaround_reference(train_index, departures, trip_counts, 30.0)
+
+    for kernel in (_turnaround, _turnaround_py):
+        total, compliant, time_sum, time_min = kernel(
+            train_index, departures, trip_counts, ROUTE_LENGTH_KM, AVG_SPEED_KMH, 30.0
+        )
+        assert (total, compliant) == expected[:2]
+        assert time_sum == pytest.approx(expected[2], rel=1e-12)
+        assert time_min == expected[3]
+
+
+@pytest.mark.parametrize("seed, num_blocks", [(0, 0), (1, 1), (2, 50), (3, 500)])
+def test_energy_kernels_match_scalar_reference(seed, num_blocks):
+    """Test the compiled and NumPy energy reductions against a per-block loop"""
+    _, _, trip_counts, block_km = _random_blocks(np.random.default_rng(seed), num_blocks)
+    expected = _energy_reference(block_km, trip_counts, 2.5, 60.0)
+
+    for kernel in (_energy, _energy_py):
+        result = kernel(block_km, trip_counts, 2.5, ROUTE_LENGTH_KM, AVG_SPEED_KMH, 60.0)
+        assert result[:3] == pytest.approx(expected[:3], rel=1e-12)
+        assert result[3] == expected[3]
+
+
+@pytest.mark.skipif(not _kernels.NUMEXPR_AVAILABLE, reason="numexpr not installed")
+def test_energy_numexpr_matches_scalar_reference():
+    """Test the fused numexpr path used for large block counts"""
+    num_blocks = _kernels.NUMEXPR_MIN_BLOCKS * 2
+    _, _, trip_counts, block_km = _random_blocks(np.random.default_rng(7), num_blocks)
+    expected = _energy_reference(block_km, trip_counts, 2.5, 60.0)
+
+    result = _kernels._energy_numexpr(block_km, trip_counts, 2.5, ROUTE_LENGTH_KM, AVG_SPEED_KMH, 60.0)
+    assert result[:3] == pytest.approx(expected[:3], rel=1e-9)
+    assert result[3] == expected[3]
+    assert energy_stats(block_km, trip_counts, 2.5, ROUTE_LENGTH_KM, AVG_SPEED_KMH, 60.0) == pytest.approx(result)
+
+
+@pytest.mark.parametrize("seed, num_trains", [(0, 0), (1, 1), (2, 40), (3, 400)])
+def test_maintenance_kernels_match_scalar_reference(seed, num_trains):
+    """Test the compiled and NumPy maintenance counts against a per-train loop"""
+    rng = np.random.default_rng(seed)
+    # Whole-interval multiples and zero mileage exercise the boundaries
+    mileage = rng.uniform(0, 60000, num_trains)
+    mileage[::7] = 0.0
+    mileage[3::7] = 19999.0
+    in_maintenance = rng.random(num_trains) < 0.3
+    in_service = ~in_maintenance & (rng.random(num_trains) < 0.8)
+    expected_counts, expected_mask = _maintenance_reference(mileage, in_maintenance, in_service, 10000.0, 1000.0)
+
+    for kernel in (_maintenance, _maintenance_py):
+        mask = np.ones(num_trains, dtype=bool)
+        counts = kernel(mileage, in_maintenance, in_service, 10000.0, 1000.0, mask)
+        assert counts == expected_counts
+        np.testing.assert_array_equal(mask, expected_mask)
+
+    counts, mask = maintenance_stats(mileage, in_maintenance, in_service, 10000.0, 1000.0)
+    assert counts == expected_counts
+    np.testing.assert_array_equal(mask, expected_mask)
+
+
+def test_turnaround_stats_accepts_lists():
+    """Test the wrapper converts plain lists to the kernel's dtypes"""
+    duration = ROUTE_LENGTH_KM * 2 / AVG_SPEED_KMH * 60
+    departures = [360, 360 + duration + 45, 360 + 2 * duration + 55, 600]
+    total, compliant, time_sum, time_min = turnaround_stats(
+        [0, 0, 0, 1], departures, [1, 1, 1, 1], ROUTE_LENGTH_KM, AVG_SPEED_KMH, 30
+    )
+    assert (total, compliant) == (2, 1)
+    assert time_sum == pytest.approx(55)
+    assert time_min == pytest.approx(10)
+
+
+def _metro_data():
+    """Status, certificate, job and component records with int and str ids"""
+    return {
+        'trainset_status': [
+            {'trainset_id': 1, 'total_mileage_km': 9500, 'last_service_date': '2024-01-01'},
+            {'trainset_id': '1', 'total_mileage_km': 100, 'last_service_date': 'not a date'},
+            {'trainset_id': 'TS-03', 'total_mileage_km': 29900},
+        ],
+        'fitness_certificates': [
+            {'trainset_id': 1, 'status': 'Expired'},
+            {'trainset_id': 'TS-04', 'status': 'Expiring-Soon'},
+            {'trainset_id': None, 'status': 'Expired'},
+        ],
+        'job_cards': [
+            {'trainset_id': '1', 'priority': 'Critical', 'status': 'Open'},
+            {'trainset_id': '1', 'priority': 'Critical', 'status': 'Open'},
+        ],
+        'component_health': [
+            {'trainset_id': 'TS-03', 'status': 'Warning'},
+        ],
+    }
+
+
+def _schedule(*trainset_ids, status='REVENUE_SERVICE'):
+    """Schedule running each trainset on two 30-minute-turnaround blocks"""
+    duration = ROUTE_LENGTH_KM * 2 / AVG_SPEED_KMH * 60
+    second = 360 + int(duration) + 31
+    blocks = [
+        {'departure_time': '06:00', 'trip_count': 1, 'estimated_km': 51.2},
+        {'departure_time': f'{second // 60:02d}:{second % 60:02d}', 'trip_count': 1, 'estimated_km': 51.2},
+    ]
+    return {'trainsets': [
+        {'trainset_id': ts_id, 'status': status, 'service_blocks': blocks, 'daily_km_allocation': 102.4}
+        for ts_id in trainset_ids
+    ]}
+
+
+def test_context_keeps_ids_as_given():
+    """Test int and str ids get separate rows and unknown ids the defaults row"""
+    context = ConstraintAnalyzer().prepare_context(_metro_data())
+
+    assert list(context.row_of) == [1, '1', 'TS-03', 'TS-04']
+    rows = context.lookup([1, '1', 'TS-03', 'TS-04', 'TS-99', None])
+    np.testing.assert_array_equal(rows, [0, 1, 2, 3, 4, 4])
+
+    np.testing.assert_array_equal(context.mileage, [9500, 100, 29900, 0, 0])
+    np.testing.assert_array_equal(context.has_expired_cert, [True, False, False, False, False])
+    np.testing.assert_array_equal(context.has_expiring_cert, [False, False, False, True, False])
+    np.testing.assert_array_equal(context.critical_job_count, [0, 2, 0, 0, 0])
+    np.testing.assert_array_equal(context.has_warning_component, [False, False, True, False, False])
+    assert np.isnat(context.last_service_dates[1:]).all()
+    assert context.last_service_dates[0] == np.datetime64('2024-01-01')
+
+
+def test_clean_schedule_has_plain_python_results():
+    """Test a compliant schedule scores 100 and fields hold plain Python numbers"""
+    metrics = ConstraintAnalyzer().analyze_schedule(_schedule('TS-10', 'TS-11'), _metro_data())
+
+    assert metrics.overall_constraint_score == 100
+    assert metrics.total_turnarounds == metrics.compliant_turnarounds == 2
+    for field in dataclasses.fields(metrics):
+        value = getattr(metrics, field.name)
+        assert not isinstance(value, np.generic), field.name
+        assert type(value) in (int, float), field.name
+
+
+def test_int_and_str_ids_are_different_trains():
+    """Test records of trainset 1 do not apply to trainset "1" and vice versa"""
+    analyzer = ConstraintAnalyzer()
+    data = _metro_data()
+
+    int_metrics = analyzer.analyze_schedule(_schedule(1), data)
+    str_metrics = analyzer.analyze_schedule(_schedule('1'), data)
+    assert (int_metrics.trains_with_expired_certs, int_metrics.trains_with_critical_jobs) == (1, 0)
+    assert (str_metrics.trains_with_expired_certs, str_metrics.trains_with_critical_jobs) == (0, 1)
+    assert int_metrics.trains_needing_maintenance == 1
+    assert str_metrics.trains_needing_maintenance == 0
+
+
+def test_analyze_schedule_memoizes_per_data():
+    """Test identical schedules share a result until different data is passed"""
+    analyzer = ConstraintAnalyzer()
+    data = _metro_data()
+
+    first = analyzer.analyze_schedule(_schedule('TS-03'), data)
+    assert analyzer.analyze_schedule(_schedule('TS-03'), data) is first
+    assert analyzer.analyze_schedule({'schedule': _schedule('TS-03')}, data) is first
+
+    other = analyzer.analyze_schedule(_schedule('TS-03'), _metro_data())
+    assert other is not first
+    assert other == first
+    assert len(analyzer._results) == 1
+
+
+def test_unserializable_schedule_is_analyzed_uncached():
+    """Test schedules orjson cannot hash are analyzed every time"""
+    analyzer = ConstraintAnalyzer()
+    schedule = _schedule('TS-03')
+    schedule['trainsets'][0]['tags'] = {'spare'}
+
+    data = _metro_data()
+
+    assert ConstraintAnalyzer._fingerprint(schedule['trainsets']) is None
+    first = analyzer.analyze_schedule(schedule, data)
+    second = analyzer.analyze_schedule(schedule, data)
+    assert second is not first
+    assert second == first == ConstraintAnalyzer().analyze_schedule(_schedule('TS-03'), data)
+    assert not analyzer._results
+
+
+def test_memo_evicts_least_recent():
+    """Test the memo keeps at most ``max_cached`` schedules"""
+    analyzer = ConstraintAnalyzer(max_cached=2)
+    data = _metro_data()
+
+    first = analyzer.analyze_schedule(_schedule('TS-01'), data)
+    analyzer.analyze_schedule(_schedule('TS-02'), data)
+    assert analyzer.analyze_schedule(_schedule('TS-01'), data) is first
+    analyzer.analyze_schedule(_schedule('TS-03'), data)
+
+    assert len(analyzer._results) == 2
+    assert analyzer.analyze_schedule(_schedule('TS-01'), data) is first
+    assert analyzer._fingerprint(_schedule('TS-02')['trainsets']) not in analyzer._results
+
+
+def test_metrics_are_frozen_and_slotted():
+    """Test memoized ConstraintMetrics cannot be modified and carry no __dict__"""
+    metrics = ConstraintAnalyzer().analyze_schedule(_schedule('TS-03'), _metro_data())
+
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        metrics.overall_constraint_score = 0
+    assert not hasattr(metrics, '__dict__')
+
+
+@pytest.mark.parametrize("n_workers", [1, 2])
+def test_analyze_schedules_matches_single_analysis(n_workers):
+    """Test batch analysis, in-process and across workers, keeps input order"""
+    data = _metro_data()
+    unhashable = _schedule('TS-04', 1)
+    unhashable['trainsets'][0]['tags'] = {'spare'}
+    schedules = [
+        _schedule(1), _schedule('1', 'TS-03'), _schedule(1),
+        _schedule('TS-04', status='MAINTENANCE'), unhashable, _schedule(),
+    ]
+
+    results = ConstraintAnalyzer().analyze_schedules(schedules, data, n_workers=n_workers)
+
+    expected = [ConstraintAnalyzer().analyze_schedule(schedule, data) for schedule in schedules]
+    assert [dataclasses.asdict(m) for m in results] == [dataclasses.asdict(m) for m in expected]
+    assert results[0] is results[2]
+
+
+def test_analyze_schedules_after_numba_parallel_call():
+    """Test the worker pool starts cleanly after numba's threading layer is up"""
+    pytest.importorskip("numba")
+    script = textwrap.dedent("""
+        import numpy as np
+        from numba import njit, prange
+
+        from benchmarks.constraint_satisfaction.constraint_analyzer import ConstraintAnalyzer
+        from benchmarks.constraint_satisfaction.tests.test_constraint_analyzer import _metro_data, _schedule
+
+        @njit(parallel=True)
+        def total(values):
+            result = 0.0
+            for i in prange(values.size):
+                result += values[i]
+            return result
+
+        total(np.ones(100_000))
+        schedules = [_schedule(1), _schedule('1', 'TS-03'), _schedule('TS-04')]
+        results = ConstraintAnalyzer().analyze_schedules(schedules, _metro_data(), n_workers=2)
+        assert len(results) == 3
+    """)
+    root = Path(__file__).resolve().parents[3]
+    proc = subprocess.run([sys.executable, "-c", script], cwd=root, timeout=120)
+    assert proc.returncode == 0
@@ -0,0 +1,121 @@
+"""
+Compiled Kernels for Fleet Utilization Analysis
+Service allocation and demand coverage for one or many fleet sizes.
+"""
+from typing import Tuple
+
+import numpy as np
+
+try:
+    from numba import njit, types
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+# Columns of the allocation table, in the order of the scalar kernel's result
+COL_AVAILABLE = 0
+COL_IN_SERVICE_PEAK = 1
+COL_IN_SERVICE_OFFPEAK = 2
+COL_STANDBY = 3
+COL_PEAK_COVERAGE = 4
+COL_OFFPEAK_COVERAGE = 5
+COL_OVERALL_COVERAGE = 6
+NUM_COLUMNS = 7
+
+
+def _allocation_py(available, min_peak, min_offpeak, peak_hours, offpeak_hours, service_hours):
+    """Service allocation and unrounded coverage for one fleet (no numba)"""
+    in_service_peak = min(available, min_peak)
+    in_service_offpeak = min(available, min_offpeak)
+    standby = max(0, available - in_service_peak)
+
+    peak_coverage = min(100.0, (available / min_peak) * 100)
+    offpeak_coverage = min(100.0, (available / min_offpeak) * 100)
+    overall_coverage = (peak_coverage * peak_hours + offpeak_coverage * offpeak_hours) / service_hours
+    return in_service_peak, in_service_offpeak, standby, peak_coverage, offpeak_coverage, overall_coverage
+
+
+def _allocation_table_py(available, min_peak, min_offpeak, peak_hours, offpeak_hours, service_hours):
+    """NumPy implementation of the allocation table (no numba)"""
+    table = np.empty((len(available), NUM_COLUMNS), dtype=np.float64)
+    table[:, COL_AVAILABLE] = available
+    table[:, COL_IN_SERVICE_PEAK] = np.minimum(available, min_peak)
+    table[:, COL_IN_SERVICE_OFFPEAK] = np.minimum(available, min_offpeak)
+    table[:, COL_STANDBY] = np.maximum(0, available - table[:, COL_IN_SERVICE_PEAK])
+
+    peak_coverage = np.minimum(100.0, available / min_peak * 100)
+    offpeak_coverage = np.minimum(100.0, available / min_offpeak * 100)
+    table[:, COL_PEAK_COVERAGE] = peak_coverage
+    table[:, COL_OFFPEAK_COVERAGE] = offpeak_coverage
+    table[:, COL_OVERALL_COVERAGE] = (peak_coverage * peak_hours + offpeak_coverage * offpeak_hours) / service_hours
+    return table
+
+
+if NUMBA_AVAILABLE:
+    @njit(
+        types.Tuple((types.int64, types.int64, types.int64, types.float64, types.float64, types.float64))(
+            types.int64, types.int64, types.int64, types.float64, types.float64, types.float64,
+        ),
+        cache=True,
+    )
+    def _allocation(available, min_peak, min_offpeak, peak_hours, offpeak_hours, service_hours):
+        """Service allocation and unrounded coverage for one fleet"""
+        in_service_peak = min(available, min_peak)
+        in_service_offpeak = min(available, min_offpeak)
+        standby = max(0, available - in_service_peak)
+
+        peak_coverage = min(100.0, (available / min_peak) * 100)
+        offpeak_coverage = min(100.0, (available / min_offpeak) * 100)
+        overall_coverage = (peak_coverage * peak_hours + offpeak_coverage * offpeak_hours) / service_hours
+        return in_service_peak, in_service_offpeak, standby, peak_coverage, offpeak_coverage, overall_coverage
+
+    @njit(
+        types.float64[:, :](
+            types.int64[:], types.int64, types.int64, types.float64, types.float64, types.float64,
+        ),
+        cache=True,
+    )
+    def _allocation_table(available, min_peak, min_offpeak, peak_hours, offpeak_hours, service_hours):
+        """Allocation table with one row per fleet size
+
+        Serial on purpose: a sweep has a few dozen rows, and numba's parallel
+        threads would make later fork-based process pools hang at exit.
+        """
+        table = np.empty((available.shape[0], NUM_COLUMNS), dtype=np.float64)
+        for i in range(available.shape[0]):
+            row = _allocation(available[i], min_peak, min_offpeak, peak_hours, offpeak_hours, service_hours)
+            table[i, COL_AVAILABLE] = available[i]
+            table[i, COL_IN_SERVICE_PEAK] = row[0]
+            table[i, COL_IN_SERVICE_OFFPEAK] = row[1]
+            table[i, COL_STANDBY] = row[2]
+            table[i, COL_PEAK_COVERAGE] = row[3]
+            table[i, COL_OFFPEAK_COVERAGE] = row[4]
+            table[i, COL_OVERALL_COVERAGE] = row[5]
+        return table
+else:
+    _allocation = _allocation_py
+    _allocation_table = _allocation_table_py
+
+
+def allocation(
+    available: int, min_peak: int, min_offpeak: int, peak_hours: float, offpeak_hours: float, service_hours: float
+) -> Tuple[int, int, int, float, float, float]:
+    """Allocate ``available`` trains to peak/off-peak service
+
+    Returns (in_service_peak, in_service_offpeak, standby, peak_coverage,
+    offpeak_coverage, overall_coverage); coverages are unrounded percentages.
+    """
+    return _allocation(
+        int(available), int(min_peak), int(min_offpeak),
+        float(peak_hours), float(offpeak_hours), float(service_hours),
+    )
+
+
+def allocation_table(
+    available, min_peak: int, min_offpeak: int, peak_hours: float, offpeak_hours: float, service_hours: float
+) -> np.ndarray:
+    """Allocation for many fleets at once, one ``NUM_COLUMNS`` row per entry of ``available``"""
+    return _allocation_table(
+        np.ascontiguousarray(available, dtype=np.int64), int(min_peak), int(min_offpeak),
+        float(peak_hours), float(offpeak_hours), float(service_hours),
+    )
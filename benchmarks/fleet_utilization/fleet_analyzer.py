@@ -3,13 +3,29 @@
 Fleet Utilization Analysis for Metro Train Scheduling
 Analyzes minimum fleet size, coverage efficiency, and train utilization rates.
 """
-from typing import Dict, List, Tuple, Any, Optional
-from datetime import datetime, time, timedelta
-import statistics
+import math
+import os
+import sys
+from bisect import bisect_left
+from typing import Dict, Iterator, List, Tuple, Optional
+from datetime import time
 from dataclasses import dataclass
+from functools import lru_cache
 
+import numpy as np
 
-@dataclass
+if not __package__:
+    # Run as a script; the kernels are still imported under their package
+    # name, which numba's on-disk cache records
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from benchmarks.fleet_utilization._kernels import (
+    COL_IN_SERVICE_OFFPEAK, COL_IN_SERVICE_PEAK, COL_OFFPEAK_COVERAGE, COL_OVERALL_COVERAGE,
+    COL_PEAK_COVERAGE, COL_STANDBY, allocation, allocation_table,
+)
+
+
+@dataclass(slots=True, frozen=True)
 class FleetUtilizationMetrics:
     """Metrics for fleet utilization analysis"""
     fleet_size: int
@@ -42,39 +58,64 @@ class FleetUtilizationMetrics:
 class FleetUtilizationAnalyzer:
     """Analyzes fleet utilization for metro scheduling optimization"""
     
+    # Kochi Metro operational parameters
+    TOTAL_SERVICE_HOURS = 18.0  # 18 hours per day
+    
+    # Peak hours definition
+    PEAK_PERIODS = (
+        (time(7, 0), time(10, 0)),   # Morning peak: 7-10 AM
+        (time(17, 0), time(20, 0)),  # Evening peak: 5-8 PM
+    )
+    
+    # Route parameters (Kochi Metro)
+    ROUTE_LENGTH_KM = 25.612
+    AVG_SPEED_KMH = 35
+    TURNAROUND_TIME_MINUTES = 10
+    
+    # Round trip time (minutes), derived once from the route parameters
+    ONE_WAY_TIME = (ROUTE_LENGTH_KM / AVG_SPEED_KMH) * 60
+    ROUND_TRIP_TIME = (ONE_WAY_TIME * 2) + (TURNAROUND_TIME_MINUTES * 2)
+    
+    # Peak periods as (start, end) minutes since midnight, and the peak/off-peak split
+    PEAK_PERIODS_MIN = tuple(
+        (start.hour * 60 + start.minute, end.hour * 60 + end.minute)
+        for start, end in PEAK_PERIODS
+    )
+    PEAK_HOURS = sum(end - start for start, end in PEAK_PERIODS_MIN) / 60.0
+    OFFPEAK_HOURS = TOTAL_SERVICE_HOURS - PEAK_HOURS
+    
     def __init__(self):
         # Kochi Metro operational parameters
         self.service_start = time(5, 0)  # 5:00 AM
         self.service_end = time(23, 0)   # 11:00 PM
-        self.total_service_hours = 18.0   # 18 hours per day
-        
-        # Peak hours definition
-        self.peak_periods = [
-            (time(7, 0), time(10, 0)),   # Morning peak: 7-10 AM
-            (time(17, 0), time(20, 0)),  # Evening peak: 5-8 PM
-        ]
+        self.total_service_hours = self.TOTAL_SERVICE_HOURS
+        self.peak_periods = list(self.PEAK_PERIODS)
         
         # Target headways (minutes between trains)
         self.peak_headway_target = 5     # 5 minutes during peak
         self.offpeak_headway_target = 10  # 10 minutes during off-peak
         
-        # Route parameters (Kochi Metro)
-        self.route_length_km = 25.612
-        self.avg_speed_kmh = 35
-        self.turnaround_time_minutes = 10
+        # Route parameters and timings
+        self.route_length_km = self.ROUTE_LENGTH_KM
+        self.avg_speed_kmh = self.AVG_SPEED_KMH
+        self.turnaround_time_minutes = self.TURNAROUND_TIME_MINUTES
+        self.one_way_time = self.ONE_WAY_TIME  # minutes
+        self.round_trip_time = self.ROUND_TRIP_TIME
+        
+        self._peak_hours = self.PEAK_HOURS
+        self._offpeak_hours = self.OFFPEAK_HOURS
         
-        # Calculate round trip time
-        self.one_way_time = (self.route_length_km / self.avg_speed_kmh) * 60  # minutes
-        self.round_trip_time = (self.one_way_time * 2) + (self.turnaround_time_minutes * 2)
+        # Fleet requirements for the target headways
+        self._min_fleet_peak = self.calculate_minimum_fleet_size(self.peak_headway_target)
+        self._min_fleet_offpeak = self.calculate_minimum_fleet_size(self.offpeak_headway_target)
+        self._min_fleet_overall = max(self._min_fleet_peak, self._min_fleet_offpeak)
         
+        # Per-train utilization over the full service day
+        self._default_util = self.calculate_train_utilization()
+    
     def calculate_peak_hours_duration(self) -> float:
         """Calculate total peak hours per day"""
-        total_peak_minutes = 0
-        for start, end in self.peak_periods:
-            start_minutes = start.hour * 60 + start.minute
-            end_minutes = end.hour * 60 + end.minute
-            total_peak_minutes += (end_minutes - start_minutes)
-        return total_peak_minutes / 60.0  # Convert to hours
+        return self._peak_hours
     
     def calculate_minimum_fleet_size(
         self,
@@ -84,7 +125,11 @@ class FleetUtilizationAnalyzer:
         """
         Calculate minimum number of trains needed to maintain headway.
         
-        Formula: Minimum Fleet = (Round Trip Time / Headway) + Buffer
+        Formula: Minimum Fleet = ceil(Round Trip Time / Headway) + Buffer
+        
+        The ceiling is the number of trains needed for a departure every
+        ``headway_minutes`` over a full round trip; truncating would leave the
+        last gap longer than the headway.
         
         Args:
             headway_minutes: Desired minutes between trains
@@ -92,17 +137,27 @@ class FleetUtilizationAnalyzer:
             
         Returns:
             Minimum number of trains required
+            
+        Raises:
+            ValueError: If ``headway_minutes`` is not positive
         """
+        if headway_minutes <= 0:
+            raise ValueError(f"Headway must be positive, got {headway_minutes}")
         rtt = round_trip_minutes if round_trip_minutes else self.round_trip_time
-        
-        # Calculate base requirement
-        base_trains = rtt / headway_minutes
+        return self._minimum_fleet_size(headway_minutes, rtt)
+    
+    @staticmethod
+    @lru_cache(maxsize=32)
+    def _minimum_fleet_size(headway_minutes: int, rtt: float) -> int:
+        """Minimum fleet for a headway and round trip time (pure, memoized)"""
+        # Calculate base requirement (trains in circulation)
+        base_trains = math.ceil(rtt / headway_minutes)
         
         # Add buffer for operational flexibility (1 train) and maintenance (10%)
         buffer_trains = 1
-        maintenance_buffer = max(1, int(base_trains * 0.1))
+        maintenance_buffer = max(1, base_trains // 10)
         
-        minimum_fleet = int(base_trains) + buffer_trains + maintenance_buffer
+        minimum_fleet = base_trains + buffer_trains + maintenance_buffer
         
         return minimum_fleet
     
@@ -122,16 +177,23 @@ class FleetUtilizationAnalyzer:
             
         Returns:
             Dictionary with coverage percentages
+            
+        Raises:
+            ValueError: If either required train count is not positive
         """
+        # Validated once here so the coverage arithmetic below stays branch-free
+        if required_trains_peak <= 0 or required_trains_offpeak <= 0:
+            raise ValueError(
+                f"Required trains must be positive, got peak={required_trains_peak}, "
+                f"offpeak={required_trains_offpeak}"
+            )
+        
         peak_coverage = min(100.0, (available_trains / required_trains_peak) * 100)
         offpeak_coverage = min(100.0, (available_trains / required_trains_offpeak) * 100)
         
         # Weight by duration
-        peak_duration = self.calculate_peak_hours_duration()
-        offpeak_duration = self.total_service_hours - peak_duration
-        
         overall_coverage = (
-            (peak_coverage * peak_duration + offpeak_coverage * offpeak_duration) 
+            (peak_coverage * self._peak_hours + offpeak_coverage * self._offpeak_hours) 
             / self.total_service_hours
         )
         
@@ -143,14 +205,14 @@ class FleetUtilizationAnalyzer:
     
     def calculate_train_utilization(
         self,
-        trains_in_service: int,
         service_hours: Optional[float] = None
     ) -> Dict[str, float]:
         """
         Calculate average operational hours and utilization per train.
         
+        Depends only on service hours, not on how many trains are in service.
+        
         Args:
-            trains_in_service: Number of trains actively in service
             service_hours: Total service hours (default: full day)
             
         Returns:
@@ -196,14 +258,15 @@ class FleetUtilizationAnalyzer:
         """
         # Penalty for excess fleet (cost inefficiency)
         excess_ratio = (fleet_size - minimum_required) / minimum_required
-        excess_penalty = min(30, excess_ratio * 20)  # Max 30 point penalty
+        excess_penalty = excess_ratio * 20
+        excess_penalty = 30.0 if excess_penalty > 30 else excess_penalty  # Max 30 point penalty
         
         # Reward for coverage (service quality)
         coverage_score = coverage_percent * 0.7  # 70% weight on coverage
         
         # Efficiency score
         efficiency = coverage_score - excess_penalty
-        efficiency = max(0, min(100, efficiency))  # Clamp to 0-100
+        efficiency = 0.0 if efficiency < 0 else (100.0 if efficiency > 100 else efficiency)  # Clamp to 0-100
         
         return round(efficiency, 2)
     
@@ -223,34 +286,39 @@ class FleetUtilizationAnalyzer:
             
         Returns:
             FleetUtilizationMetrics object with complete analysis
+            
+        Raises:
+            ValueError: If ``total_fleet`` is not positive
         """
+        if total_fleet <= 0:
+            raise ValueError(f"Fleet size must be positive, got {total_fleet}")
+        
         # Calculate available trains
         available_trains = total_fleet - trains_in_maintenance - trains_reserved
         
-        # Calculate minimum requirements
-        min_fleet_peak = self.calculate_minimum_fleet_size(self.peak_headway_target)
-        min_fleet_offpeak = self.calculate_minimum_fleet_size(self.offpeak_headway_target)
-        min_fleet_overall = max(min_fleet_peak, min_fleet_offpeak)
-        
-        # Determine actual service allocation
-        trains_in_service_peak = min(available_trains, min_fleet_peak)
-        trains_in_service_offpeak = min(available_trains, min_fleet_offpeak)
-        trains_in_standby = max(0, available_trains - trains_in_service_peak)
-        
-        # Coverage analysis
-        coverage = self.calculate_demand_coverage(
-            available_trains,
-            min_fleet_peak,
-            min_fleet_offpeak
+        # Minimum requirements (fixed for the analyzer's headway targets)
+        min_fleet_peak = self._min_fleet_peak
+        min_fleet_offpeak = self._min_fleet_offpeak
+        min_fleet_overall = self._min_fleet_overall
+        
+        # Service allocation and coverage analysis (compiled kernel)
+        (
+            trains_in_service_peak, trains_in_service_offpeak, trains_in_standby,
+            peak_coverage, offpeak_coverage, overall_coverage
+        ) = allocation(
+            available_trains, min_fleet_peak, min_fleet_offpeak,
+            self._peak_hours, self._offpeak_hours, self.total_service_hours
         )
+        coverage = {
+            "peak_coverage_percent": round(peak_coverage, 2),
+            "offpeak_coverage_percent": round(offpeak_coverage, 2),
+            "overall_coverage_percent": round(overall_coverage, 2)
+        }
         
         # Utilization analysis
-        utilization = self.calculate_train_utilization(trains_in_service_peak)
+        utilization = self._default_util
         
         # Efficiency scores
-        peak_duration = self.calculate_peak_hours_duration()
-        offpeak_duration = self.total_service_hours - peak_duration
-        
         fleet_efficiency = self.calculate_fleet_efficiency_score(
             total_fleet,
             min_fleet_overall,
@@ -274,12 +342,17 @@ class FleetUtilizationAnalyzer:
             avg_idle_hours_per_train=utilization["avg_idle_hours"],
             utilization_rate_percent=utilization["utilization_rate_percent"],
             total_service_hours=self.total_service_hours,
-            peak_hours_duration=peak_duration,
-            offpeak_hours_duration=offpeak_duration,
+            peak_hours_duration=self._peak_hours,
+            offpeak_hours_duration=self._offpeak_hours,
             fleet_efficiency_score=fleet_efficiency,
             cost_efficiency_score=round(cost_efficiency, 2)
         )
     
+    @staticmethod
+    def _maintenance_trains(fleet_size: int, maintenance_rate: float = 0.1) -> int:
+        """Trains held for maintenance: the rate's share of the fleet, at least one"""
+        return max(1, int(fleet_size * maintenance_rate))
+    
     def compare_fleet_sizes(
         self,
         fleet_sizes: List[int],
@@ -295,14 +368,83 @@ class FleetUtilizationAnalyzer:
         Returns:
             Dictionary mapping fleet size to metrics
         """
-        results = {}
+        return dict(self.iter_fleet_sizes(fleet_sizes, maintenance_rate))
+    
+    def iter_fleet_sizes(
+        self,
+        fleet_sizes: List[int],
+        maintenance_rate: float = 0.1
+    ) -> Iterator[Tuple[int, FleetUtilizationMetrics]]:
+        """
+        Lazily yield (fleet size, metrics) for each configuration, in input order.
         
-        for size in fleet_sizes:
-            maintenance_trains = max(1, int(size * maintenance_rate))
-            metrics = self.analyze_fleet_configuration(size, maintenance_trains)
-            results[size] = metrics
+        The arithmetic runs over all sizes up front; metrics objects are only
+        built as the iterator is consumed, so callers can stop early.
         
-        return results
+        Args:
+            fleet_sizes: List of fleet sizes to analyze
+            maintenance_rate: Percentage of fleet in maintenance (default 10%)
+            
+        Returns:
+            Iterator of (fleet size, FleetUtilizationMetrics) pairs
+        """
+        # Same arithmetic as analyze_fleet_configuration, over all sizes at once
+        sizes = np.asarray(fleet_sizes, dtype=np.int64)
+        if (sizes <= 0).any():
+            raise ValueError(f"Fleet sizes must be positive, got {sizes[sizes <= 0].tolist()}")
+        # Vectorized _maintenance_trains
+        maintenance = np.maximum(1, (sizes * maintenance_rate).astype(np.int64))
+        table = allocation_table(
+            sizes - maintenance, self._min_fleet_peak, self._min_fleet_offpeak,
+            self._peak_hours, self._offpeak_hours, self.total_service_hours
+        )
+        in_service_peak = table[:, COL_IN_SERVICE_PEAK].astype(np.int64)
+        in_service_offpeak = table[:, COL_IN_SERVICE_OFFPEAK].astype(np.int64)
+        standby = table[:, COL_STANDBY].astype(np.int64)
+        peak_coverage = table[:, COL_PEAK_COVERAGE]
+        offpeak_coverage = table[:, COL_OFFPEAK_COVERAGE]
+        overall_coverage = table[:, COL_OVERALL_COVERAGE]
+        
+        # Scores use the reported (rounded) coverage; Python's round() is kept
+        # throughout since np.round can differ from it in the last digit
+        overall_coverage = np.array([round(value, 2) for value in overall_coverage.tolist()])
+        
+        excess_penalty = np.minimum(30, (sizes - self._min_fleet_overall) / self._min_fleet_overall * 20)
+        fleet_efficiency = np.clip(overall_coverage * 0.7 - excess_penalty, 0, 100)
+        cost_efficiency = self._min_fleet_overall / sizes * overall_coverage
+        
+        rows = zip(
+            sizes.tolist(), maintenance.tolist(), in_service_peak.tolist(), in_service_offpeak.tolist(),
+            standby.tolist(), peak_coverage.tolist(), offpeak_coverage.tolist(),
+            overall_coverage.tolist(), fleet_efficiency.tolist(), cost_efficiency.tolist()
+        )
+        return self._box_metrics(rows)
+    
+    def _box_metrics(self, rows) -> Iterator[Tuple[int, FleetUtilizationMetrics]]:
+        """Build metrics from iter_fleet_sizes rows as they are requested"""
+        # Utilization does not depend on the fleet size
+        utilization = self._default_util
+        
+        for size, maint, peak, offpeak, spare, peak_cov, offpeak_cov, overall, fleet_eff, cost_eff in rows:
+            yield size, FleetUtilizationMetrics(
+                fleet_size=size,
+                minimum_required_trains=self._min_fleet_overall,
+                trains_in_service_peak=peak,
+                trains_in_service_offpeak=offpeak,
+                trains_in_standby=spare,
+                trains_in_maintenance=maint,
+                peak_demand_coverage_percent=round(peak_cov, 2),
+                offpeak_demand_coverage_percent=round(offpeak_cov, 2),
+                overall_coverage_percent=overall,
+                avg_operational_hours_per_train=utilization["avg_operational_hours"],
+                avg_idle_hours_per_train=utilization["avg_idle_hours"],
+                utilization_rate_percent=utilization["utilization_rate_percent"],
+                total_service_hours=self.total_service_hours,
+                peak_hours_duration=self._peak_hours,
+                offpeak_hours_duration=self._offpeak_hours,
+                fleet_efficiency_score=round(fleet_eff, 2),
+                cost_efficiency_score=round(cost_eff, 2)
+            )
     
     def find_optimal_fleet_size(
         self,
@@ -319,27 +461,39 @@ class FleetUtilizationAnalyzer:
         Returns:
             Tuple of (optimal_fleet_size, metrics)
         """
-        # Start from minimum required and increment
-        min_theoretical = self.calculate_minimum_fleet_size(self.peak_headway_target)
+        # Start from minimum required
+        min_theoretical = self._min_fleet_peak
+        candidates = range(min_theoretical, max_fleet + 1)
         
-        for fleet_size in range(min_theoretical, max_fleet + 1):
-            maintenance_trains = max(1, int(fleet_size * 0.1))
-            metrics = self.analyze_fleet_configuration(fleet_size, maintenance_trains)
-            
-            if metrics.overall_coverage_percent >= min_coverage_required:
-                return fleet_size, metrics
+        maintenance_trains = self._maintenance_trains
+        analyze_configuration = self.analyze_fleet_configuration
+        
+        def analyze(fleet_size: int) -> FleetUtilizationMetrics:
+            return analyze_configuration(fleet_size, maintenance_trains(fleet_size))
+        
+        # Available trains (size minus ~10% maintenance) never drop as the fleet
+        # grows, so coverage is monotonic and the smallest passing size bisects
+        index = bisect_left(
+            candidates, True,
+            key=lambda fleet_size: analyze(fleet_size).overall_coverage_percent >= min_coverage_required
+        )
+        if index < len(candidates):
+            return candidates[index], analyze(candidates[index])
         
         # If no solution found, return largest tested
-        metrics = self.analyze_fleet_configuration(max_fleet, int(max_fleet * 0.1))
-        return max_fleet, metrics
+        return max_fleet, analyze(max_fleet)
+
+
+# Section rule for the report, built once rather than on every call
+_RULE = '=' * 70
 
 
 def format_metrics_report(metrics: FleetUtilizationMetrics) -> str:
     """Format metrics into a readable report"""
     report = f"""
-{'='*70}
+{_RULE}
 FLEET UTILIZATION ANALYSIS REPORT
-{'='*70}
+{_RULE}
 
 Fleet Configuration:
   Total Fleet Size:              {metrics.fleet_size} trains
@@ -371,7 +525,7 @@ Efficiency Scores:
   Fleet Efficiency:              {metrics.fleet_efficiency_score:.1f}/100
   Cost Efficiency:               {metrics.cost_efficiency_score:.1f}/100
 
-{'='*70}
+{_RULE}
 """
     return report
 
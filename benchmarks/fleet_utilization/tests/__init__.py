@@ -0,0 +1 @@
+"""Tests for fleet utilization analysis"""
@@ -0,0 +1,112 @@
+"""
+Unit tests for fleet utilization analysis
+"""
+import dataclasses
+
+import numpy as np
+import pytest
+
+from benchmarks.fleet_utilization._kernels import (
+    NUM_COLUMNS, _allocation_py, _allocation_table_py, allocation, allocation_table
+)
+from benchmarks.fleet_utilization.fleet_analyzer import FleetUtilizationAnalyzer
+
+
+def test_default_minimum_fleet_sizes():
+    """Test the default route needs 25 trains at peak and 13 off-peak"""
+    analyzer = FleetUtilizationAnalyzer()
+    assert analyzer.calculate_minimum_fleet_size(5) == 25
+    assert analyzer.calculate_minimum_fleet_size(10) == 13
+
+
+@pytest.mark.parametrize("headway, round_trip, expected", [
+    (5, 60.0, 14),         # exact multiple: 12 + 1 + 1
+    (5, 59.5, 14),         # just below rounds up to the same 12
+    (5, 60.000001, 15),    # just above needs a 13th train in circulation
+    (10, 100.0, 12),       # 10 + 1 + max(1, 10 // 10)
+    (10, 90.1, 12),        # ceil(9.01) = 10
+    (1, 100.0, 111),       # 100 + 1 + 10
+    (120, 60.0, 3),        # one train circulating still gets both buffers
+])
+def test_minimum_fleet_size_rounds_up(headway, round_trip, expected):
+    """Test trains in circulation are ceil(round trip / headway), plus buffers"""
+    analyzer = FleetUtilizationAnalyzer()
+    assert analyzer.calculate_minimum_fleet_size(headway, round_trip) == expected
+
+
+@pytest.mark.parametrize("headway", [0, -5])
+def test_minimum_fleet_size_rejects_non_positive_headway(headway):
+    """Test a zero or negative headway raises"""
+    with pytest.raises(ValueError):
+        FleetUtilizationAnalyzer().calculate_minimum_fleet_size(headway)
+
+
+def test_allocation_kernels_match_scalar_reference():
+    """Test the scalar and table kernels agree with the pure-Python allocation"""
+    available = np.arange(-3, 60)
+    hours = (6.0, 12.0, 18.0)
+    for min_peak, min_offpeak in ((25, 13), (1, 1), (40, 7)):
+        expected = [_allocation_py(int(a), min_peak, min_offpeak, *hours) for a in available]
+        
+        assert [allocation(a, min_peak, min_offpeak, *hours) for a in available] == expected
+        for table in (
+            allocation_table(available, min_peak, min_offpeak, *hours),
+            _allocation_table_py(available, min_peak, min_offpeak, *hours),
+        ):
+            assert table.shape == (len(available), NUM_COLUMNS)
+            np.testing.assert_array_equal(table[:, 0], available)
+            np.testing.assert_array_equal(table[:, 1:], np.array(expected, dtype=np.float64))
+
+
+def test_compare_fleet_sizes_matches_single_analysis():
+    """Test the vectorized sweep reproduces analyze_fleet_configuration exactly"""
+    analyzer = FleetUtilizationAnalyzer()
+    sizes = [1, 2, 9, 10, 11, 19, 20, 24, 25, 26, 30, 40, 55, 100]
+    
+    compared = analyzer.compare_fleet_sizes(sizes)
+    
+    assert list(compared) == sizes
+    for size, metrics in compared.items():
+        expected = analyzer.analyze_fleet_configuration(size, analyzer._maintenance_trains(size))
+        assert dataclasses.asdict(metrics) == dataclasses.asdict(expected)
+
+
+def test_metrics_are_frozen_and_slotted():
+    """Test FleetUtilizationMetrics cannot be modified and carry no __dict__"""
+    metrics = FleetUtilizationAnalyzer().analyze_fleet_configuration(30, 3)
+    
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        metrics.fleet_size = 31
+    assert not hasattr(metrics, '__dict__')
+
+
+def test_iter_fleet_sizes_is_lazy_and_validates():
+    """Test sizes are validated up front and metrics can be consumed one at a time"""
+    analyzer = FleetUtilizationAnalyzer()
+    size, metrics = next(analyzer.iter_fleet_sizes([30, 40]))
+    assert size == metrics.fleet_size == 30
+    
+    with pytest.raises(ValueError):
+        analyzer.iter_fleet_sizes([10, 0])
+    with pytest.raises(ValueError):
+        analyzer.analyze_fleet_configuration(0)
+
+
+@pytest.mark.parametrize("min_coverage", [0.0, 50.0, 90.0, 95.0, 97.3, 99.0, 100.0, 101.0])
+@pytest.mark.parametrize("max_fleet", [25, 30, 50])
+def test_find_optimal_fleet_size_matches_linear_scan(min_coverage, max_fleet):
+    """Test the bisection returns the smallest passing size, else max_fleet"""
+    analyzer = FleetUtilizationAnalyzer()
+    
+    def analyze(size):
+        return analyzer.analyze_fleet_configuration(size, analyzer._maintenance_trains(size))
+    
+    expected = next(
+        (size for size in range(analyzer._min_fleet_peak, max_fleet + 1)
+         if analyze(size).overall_coverage_percent >= min_coverage),
+        max_fleet
+    )
+    
+    size, metrics = analyzer.find_optimal_fleet_size(min_coverage, max_fleet)
+    assert size == expected
+    assert dataclasses.asdict(metrics) == dataclasses.asdict(analyze(expected))
@@ -2,12 +2,15 @@
 API Test Suite for DataService
 Tests all endpoints and saves results to JSON
 """
-import requests
+import asyncio
+import httpx
 import json
 from datetime import datetime
 
 
 BASE_URL = "http://localhost:8000"
+# Larger JSON responses are recorded as a summary instead of in full
+MAX_CAPTURED_BYTES = 64 * 1024
 results = {
     "test_run": datetime.now().isoformat(),
     "base_url": BASE_URL,
@@ -15,21 +18,26 @@ results = {
 }
 
 
-def test_endpoint(name, method, endpoint, **kwargs):
-    """Test an API endpoint and record results"""
-    print(f"\nTesting: {name}")
-    print(f"  {method} {endpoint}")
+def summarize_response(data, num_bytes):
+    """Top-level shape of a JSON response too large to keep"""
+    summary = {"bytes": num_bytes}
+    if isinstance(data, dict):
+        summary["keys"] = list(data.keys())
+    elif isinstance(data, list):
+        summary["items"] = len(data)
+    return summary
+
+
+async def test_endpoint(client, name, method, endpoint, **kwargs):
+    """Test an API endpoint and return its result record"""
+    lines = [f"\nTesting: {name}", f"  {method} {endpoint}"]
     
     try:
-        url = f"{BASE_URL}{endpoint}"
-        
-        if method == "GET":
-            response = requests.get(url, **kwargs)
-        elif method == "POST":
-            response = requests.post(url, **kwargs)
-        else:
+        if method not in ("GET", "POST"):
             raise ValueError(f"Unsupported method: {method}")
         
+        response = await client.request(method, endpoint, **kwargs)
+        
         result = {
             "name": name,
             "method": method,
@@ -42,16 +50,20 @@ def test_endpoint(name, method, endpoint, **kwargs):
         
         if response.status_code == 200:
             try:
-                result["response_data"] = response.json()
-                print(f"  ✓ Success - {response.status_code}")
+                data = response.json()
+                if len(response.content) > MAX_CAPTURED_BYTES:
+                    result["response_summary"] = summarize_response(data, len(response.content))
+                else:
+                    result["response_data"] = data
+                lines.append(f"  ✓ Success - {response.status_code}")
             except:
                 result["response_text"] = response.text[:200]
-                print(f"  ✓ Success - {response.status_code} (non-JSON)")
+                lines.append(f"  ✓ Success - {response.status_code} (non-JSON)")
         else:
             result["error"] = response.text[:500]
-            print(f"  ✗ Failed - {response.status_code}")
+            lines.append(f"  ✗ Failed - {response.status_code}")
         
-        results["tests"].append(result)
+        print("\n".join(lines))
         return result
         
     except Exception as e:
@@ -63,8 +75,8 @@ def test_endpoint(name, method, endpoint, **kwargs):
             "error": str(e),
             "timestamp": datetime.now().isoformat()
         }
-        results["tests"].append(result)
-        print(f"  ✗ Error: {e}")
+        lines.append(f"  ✗ Error: {e}")
+        print("\n".join(lines))
         return result
 
 
@@ -74,29 +86,48 @@ def run_tests():
     print("DataService API Test Suite")
     print("=" * 70)
     
+    asyncio.run(_run_tests())
+
+
+async def _run_tests():
+    """Issue every test request concurrently over one pooled client"""
+    async with httpx.AsyncClient(base_url=BASE_URL, timeout=60) as client:
+        # Results are recorded in test order, whatever order responses arrive in
+        for result in await asyncio.gather(*(
+            test_endpoint(client, *args, **kwargs) for args, kwargs in TESTS
+        )):
+            results["tests"].append(result)
+
+
+def _test(*args, **kwargs):
+    """Bundle one test_endpoint call for TESTS"""
+    return args, kwargs
+
+
+TESTS = [
     # Test 1: Root endpoint
-    test_endpoint(
+    _test(
         "Root Endpoint",
         "GET",
         "/"
-    )
+    ),
     
     # Test 2: Health check
-    test_endpoint(
+    _test(
         "Health Check",
         "GET",
         "/health"
-    )
+    ),
     
     # Test 3: Quick schedule generation
-    test_endpoint(
+    _test(
         "Quick Schedule Generation",
         "POST",
         "/api/v1/generate/quick?date=2025-10-26&num_trains=25&num_stations=25"
-    )
+    ),
     
     # Test 4: Full schedule generation
-    test_endpoint(
+    _test(
         "Full Schedule Generation",
         "POST",
         "/api/v1/generate",
@@ -108,38 +139,38 @@ def run_tests():
             "min_standby_trains": 3
         },
         headers={"Content-Type": "application/json"}
-    )
+    ),
     
     # Test 5: Example schedule
-    test_endpoint(
+    _test(
         "Example Schedule",
         "GET",
         "/api/v1/schedule/example"
-    )
+    ),
     
     # Test 6: Route information
-    test_endpoint(
+    _test(
         "Route Information (25 stations)",
         "GET",
         "/api/v1/route/25"
-    )
+    ),
     
     # Test 7: Train health data
-    test_endpoint(
+    _test(
         "Train Health Data (30 trains)",
         "GET",
         "/api/v1/trains/health/30"
-    )
+    ),
     
     # Test 8: Depot layout
-    test_endpoint(
+    _test(
         "Depot Layout",
         "GET",
         "/api/v1/depot/layout"
-    )
+    ),
     
     # Test 9: Custom schedule with all parameters
-    test_endpoint(
+    _test(
         "Custom Schedule Full Parameters",
         "POST",
         "/api/v1/generate",
@@ -156,14 +187,15 @@ def run_tests():
             "prioritize_branding": True
         },
         headers={"Content-Type": "application/json"}
-    )
+    ),
     
     # Test 10: Quick generation with minimal params
-    test_endpoint(
+    _test(
         "Quick Generation Minimal",
         "POST",
         "/api/v1/generate/quick?date=2025-10-27&num_trains=20"
-    )
+    ),
+]
 
 
 def save_results():
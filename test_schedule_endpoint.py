@@ -21,6 +21,9 @@ from DataService.generators.enhanced_generator import EnhancedMetroDataGenerator
 
 BASE_URL = "http://localhost:7860"
 
+# One keep-alive session for the whole run instead of a new connection per request
+SESSION = requests.Session()
+
 
 def generate_synthetic_data_local(num_trainsets: int) -> dict:
     """Generate synthetic data locally without using API."""
@@ -111,7 +114,7 @@ def test_with_api_generator(num_trainsets: int, output_dir: str):
     # Step 1: Generate synthetic data via API
     print("\nStep 1: Generating synthetic data via /generate-synthetic...")
     
-    gen_response = requests.post(
+    gen_response = SESSION.post(
         f"{BASE_URL}/generate-synthetic",
         json={"num_trainsets": num_trainsets}
     )
@@ -165,7 +168,7 @@ def test_with_api_generator(num_trainsets: int, output_dir: str):
     # Step 3: Call /schedule endpoint
     print("\nStep 2: Calling /schedule endpoint...")
     
-    schedule_response = requests.post(
+    schedule_response = SESSION.post(
         f"{BASE_URL}/schedule",
         json=schedule_request
     )
@@ -240,7 +243,7 @@ def test_with_local_generator(num_trainsets: int, output_dir: str):
     # Step 3: Call /schedule endpoint
     print("\nStep 2: Calling /schedule endpoint...")
     
-    schedule_response = requests.post(
+    schedule_response = SESSION.post(
         f"{BASE_URL}/schedule",
         json=schedule_request
     )
@@ -386,7 +389,7 @@ def test_with_dataservice_generator(num_trainsets: int, output_dir: str):
     # Step 3: Call /schedule endpoint
     print("\nStep 2: Calling /schedule endpoint...")
     
-    schedule_response = requests.post(
+    schedule_response = SESSION.post(
         f"{BASE_URL}/schedule",
         json=schedule_request
     )
@@ -430,7 +433,7 @@ def main():
     
     # Check API health
     try:
-        health = requests.get(f"{BASE_URL}/health", timeout=5)
+        health = SESSION.get(f"{BASE_URL}/health", timeout=5)
         if health.status_code != 200:
             print(f"\n❌ API not healthy: {health.status_code}")
             return